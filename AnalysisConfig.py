@@ -0,0 +1,113 @@
+class AnalysisConfig:
+    def __init__(self, **values):
+        '''
+        All of the tunable thresholds of the analysis pipeline.
+        Any value can be overridden by a keyword argument with its name.
+
+        {Number} ratio_threshold - The maximum distance ratio between the best and second best
+                                   feature matches, to accept the best one (Lowe's ratio test)
+        {Number} max_stretch - The maximum stretch of the target's edges in a true homography [0-1]
+        {String} homography_method - The robust estimator of the homography
+                                     (see HomographicMatcher.ESTIMATORS, e.g. 'ransac' or 'usac_magsac')
+        {Number} homography_threshold - The maximum reprojection error of a feature match
+                                        that agrees with the homography [px]
+        {Number} seed_inlier_ratio - The minimum part of the feature matches that must agree with
+                                     the previous frame's homography in order to refine it,
+                                     instead of estimating a new one (above 1 to always estimate a new one)
+        {Number} pose_smoothing - The weight of each new pose measurement in the pose filter [0-1]
+        {Number} pose_reset_distance - The distance [px] of a corner's movement that resets the pose filter
+        {Number} blur_kernel - The size of the gaussian kernel used before subtracting the background
+        {Number} circle_min_dist - The minimum distance between the centers of two detected circles [px]
+        {Number} circle_param1 - The upper Canny threshold of the circle detection
+        {Number} circle_param2 - The accumulator threshold of the circle detection
+        {Number} circle_radius_margin - The maximum radius of the target's outer ring,
+                                        relative to its estimated radius
+        {Number} circle_min_radius_ratio - The minimum radius of the target's outer ring,
+                                           relative to its estimated radius
+        {Number} circle_downsample - The factor by which the area around the target is downsampled
+                                     before the outer ring is searched (1 for the full resolution)
+        {Number} ring_rescale_tolerance - The relative change of the target's scale,
+                                          above which the outer ring is searched again [0-1]
+        {Number} diff_threshold - The minimum difference [0-255] of a pixel from the model
+                                  to consider it a part of a projectile
+        {Number} morph_kernel - The size of the kernel used to open and close the projectiles' images
+        {Number} lines_threshold - The accumulator threshold of the line detection
+        {Number} lines_min_length - The minimum length of a detected line segment [px]
+        {Number} lines_max_gap - The maximum gap between two points of the same line segment [px]
+        {Number} line_thickness - The thickness of the emphasized lines [px]
+        {Number} contour_samples - Amount of points tested along each projectile's contour
+                                   to tell if it's straight
+        {Number} contour_min_length - The minimum length of a projectile contour's bounding rectangle [px]
+        {Number} contour_min_elongation - The minimum ratio between the length and the width
+                                          of a projectile contour's bounding rectangle
+        {Number} hit_distance_tolerance - Amount of pixels around a hit that can be ignored
+                                          in order to consider another hit as the same one
+        {Number} min_verified_reputation - The minimum reputation needed to verify a hit
+        {Number} candidate_capacity - Maximum amount of candidate hits (None for no limit)
+        {Number} candidate_max_age - Maximum amount of frames in which a candidate hit
+                                     can wait for verification (None for no limit)
+        {Boolean} rectified - True to warp the target's region of each frame into the model's space
+                              and find the hits there, instead of warping the model into the frame
+        '''
+
+        defaults = {
+            'ratio_threshold': .7,
+            'max_stretch': .2,
+            'homography_method': 'ransac',
+            'homography_threshold': 5,
+            'seed_inlier_ratio': .6,
+            'pose_smoothing': .3,
+            'pose_reset_distance': 25,
+            'blur_kernel': 3,
+            'circle_min_dist': 20,
+            'circle_param1': 50,
+            'circle_param2': 30,
+            'circle_radius_margin': 1.05,
+            'circle_min_radius_ratio': .8,
+            'circle_downsample': 2,
+            'ring_rescale_tolerance': .02,
+            'diff_threshold': 20,
+            'morph_kernel': 3,
+            'lines_threshold': 120,
+            'lines_min_length': 20,
+            'lines_max_gap': 0,
+            'line_thickness': 5,
+            'contour_samples': 5,
+            'contour_min_length': 10,
+            'contour_min_elongation': 1.5,
+            'hit_distance_tolerance': 30,
+            'min_verified_reputation': 15,
+            'candidate_capacity': 200,
+            'candidate_max_age': None,
+            'rectified': False
+        }
+
+        unknown = set(values) - set(defaults)
+
+        if len(unknown):
+            raise ValueError('Unknown analysis parameters: ' + ', '.join(sorted(unknown)))
+
+        defaults.update(values)
+        self.__dict__.update(defaults)
+
+    def replace(self, **values):
+        '''
+        Parameters:
+            {Object} values - The values to override
+
+        Returns:
+            {AnalysisConfig} A copy of the configuration with the given values overridden.
+        '''
+
+        return AnalysisConfig(**dict(self.get_state(), **values))
+
+    def get_state(self):
+        '''
+        Returns:
+            {Dictionary} All of the configuration's values, by their names.
+        '''
+
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return 'AnalysisConfig(' + ', '.join(k + '=' + repr(v) for k, v in sorted(self.__dict__.items())) + ')'
\ No newline at end of file
@@ -0,0 +1,303 @@
+from concurrent.futures import ThreadPoolExecutor
+from VideoAnalyzer import VideoAnalyzer
+from TargetModel import TargetModel
+import numpy as np
+import asyncio
+import json
+import cv2
+import os
+
+def serialize_result(result, frameIndex):
+    '''
+    Convert the result of a processed frame to a JSON compatible dictionary.
+
+    Parameters:
+        {Dictionary} result - The result of VideoAnalyzer.process_frame
+        {Number} frameIndex - The index of the frame in its session
+
+    Returns:
+        {Dictionary} A dictionary consisting only of lists, numbers and strings.
+    '''
+
+    def hit_to_dict(hit):
+        return { 'x': int(hit.point[0]), 'y': int(hit.point[1]), 'score': int(hit.score) }
+
+    bullseye = result['bullseye']
+    verified_scores = [h.score for h in result['verified']]
+
+    return {
+        'frame': frameIndex,
+        'bullseye': [float(bullseye[0]), float(bullseye[1])] if type(bullseye) != type(None) else None,
+        'candidates': [hit_to_dict(h) for h in result['candidates']],
+        'verified': [hit_to_dict(h) for h in result['verified']],
+        'arrows': len(verified_scores),
+        'total_score': int(sum(verified_scores)),
+        'grouping_diameter': float(result['grouping_diameter']),
+        'grouping_mean_radius': float(result['grouping_mean_radius']),
+        'grouping_offset': float(result['grouping_offset'])
+    }
+
+class AnalysisServer:
+    def __init__(self, targetModel, workers=None, queueSize=8):
+        '''
+        {TargetModel} targetModel - The target that appears in all sessions' frames.
+                                    Its features are computed once and shared among the sessions.
+        {Number} workers - Maximum amount of frames that are analyzed simultaneously
+                           (defaults to the amount of CPU cores)
+        {Number} queueSize - Maximum amount of frames waiting to be analyzed in each session.
+                             When the queue is full, the session's socket is not read anymore,
+                             until the analysis catches up.
+        '''
+
+        self.target = targetModel
+        self.queue_size = queueSize
+        self.executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count())
+        self.server = None
+
+    async def start(self, host, port):
+        '''
+        Start accepting sessions.
+        Each connection is a single session (e.g. a single camera), with its own hits tracking.
+
+        Parameters:
+            {String} host - The host to bind to
+            {Number} port - The port to listen to (0 to pick a free one)
+
+        Returns:
+            {Number} The port that the server listens to.
+        '''
+
+        self.server = await asyncio.start_server(self._serve_session, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        '''
+        Stop accepting sessions and release the analysis workers.
+        '''
+
+        self.server.close()
+        await self.server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+    def _analyze(self, analyzer, data, frameIndex):
+        '''
+        Decode and analyze a single frame of a session (runs in a worker thread).
+
+        Parameters:
+            {VideoAnalyzer} analyzer - The analyzer of the session
+            {bytes} data - The encoded frame
+            {Number} frameIndex - The index of the frame in the session
+
+        Returns:
+            {Dictionary} The serialized result of the frame.
+        '''
+
+        frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+        if type(frame) == type(None):
+            return { 'frame': frameIndex, 'error': 'Frame could not be decoded.' }
+
+        # a frame that fails is reported to the client, and the session goes on
+        try:
+            return serialize_result(analyzer.process_frame(frame), frameIndex)
+        except Exception as e:
+            return { 'frame': frameIndex, 'error': type(e).__name__ + ': ' + str(e) }
+
+    async def _enqueue(self, frames, data, worker):
+        '''
+        Queue a frame of a session, unless the session's responder has stopped.
+
+        Parameters:
+            {asyncio.Queue} frames - The queued frames of the session
+            {bytes} data - The encoded frame (or None to end the session)
+            {asyncio.Future} worker - The session's responder
+
+        Returns:
+            {Boolean} True if the frame is queued, or False if the responder has stopped.
+        '''
+
+        if worker.done():
+            return False
+
+        # waits while the queue is full, which blocks the client's stream
+        put = asyncio.ensure_future(frames.put(data))
+        await asyncio.wait([put, worker], return_when=asyncio.FIRST_COMPLETED)
+
+        if not put.done():
+            put.cancel()
+            return False
+
+        return True
+
+    async def _serve_session(self, reader, writer):
+        '''
+        Read the frames of a session and respond with a result line for each of them.
+
+        The client sends each frame as a JSON header line ({"size": <bytes>}) followed by
+        the bytes of the encoded image. A zero size or a closed connection ends the session.
+        '''
+
+        analyzer = VideoAnalyzer(None, self.target)
+        frames = asyncio.Queue(maxsize=self.queue_size)
+        worker = asyncio.ensure_future(self._respond(analyzer, frames, writer))
+
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+
+                size = json.loads(header)['size']
+                if size == 0:
+                    break
+
+                if not await self._enqueue(frames, await reader.readexactly(size), worker):
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, KeyError):
+            pass
+
+        await self._enqueue(frames, None, worker)
+
+        try:
+            await worker
+        except Exception:
+            pass
+
+        writer.close()
+
+    async def _respond(self, analyzer, frames, writer):
+        '''
+        Analyze the queued frames of a session in order and stream back their results.
+        '''
+
+        loop = asyncio.get_event_loop()
+        frame_index = 0
+
+        try:
+            while True:
+                data = await frames.get()
+                if data == None:
+                    break
+
+                result = await loop.run_in_executor(self.executor, self._analyze, analyzer, data, frame_index)
+                frame_index += 1
+
+                try:
+                    writer.write((json.dumps(result) + '\n').encode())
+                    await writer.drain()
+                except ConnectionError:
+                    break
+        finally:
+            # drop the frames that will never be analyzed
+            while not frames.empty():
+                frames.get_nowait()
+
+class AnalysisClient:
+    def __init__(self, encoding='.jpg'):
+        '''
+        A local stand-in for a camera that streams its frames to an AnalysisServer.
+
+        {String} encoding - The image format in which the frames are sent
+        '''
+
+        self.encoding = encoding
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, host, port):
+        '''
+        Open a new session in the server.
+        '''
+
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+
+    async def send_frame(self, frame):
+        '''
+        Send a frame to the server.
+        Waits while the server's queue of this session is full.
+
+        Parameters:
+            {Numpy.array} frame - The frame to send
+        '''
+
+        _, data = cv2.imencode(self.encoding, frame)
+        data = data.tobytes()
+        self.writer.write((json.dumps({ 'size': len(data) }) + '\n').encode())
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def receive_result(self):
+        '''
+        Returns:
+            {Dictionary} The result of the next analyzed frame, or None if the session is over.
+        '''
+
+        line = await self.reader.readline()
+        return json.loads(line) if line else None
+
+    async def close(self):
+        '''
+        End the session.
+        '''
+
+        self.writer.write((json.dumps({ 'size': 0 }) + '\n').encode())
+        await self.writer.drain()
+
+    async def stream_video(self, videoPath, host, port):
+        '''
+        Stream a whole video to the server as a single session.
+
+        Parameters:
+            {String} videoPath - The path of the video to stream
+            {String} host - The host of the server
+            {Number} port - The port of the server
+
+        Returns:
+            {List} The results of all frames of the video.
+        '''
+
+        async def send_all():
+            cap = cv2.VideoCapture(videoPath)
+
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+
+                await self.send_frame(frame)
+
+            cap.release()
+            await self.close()
+
+        await self.connect(host, port)
+        sender = asyncio.ensure_future(send_all())
+        results = []
+
+        while True:
+            result = await self.receive_result()
+            if result == None:
+                break
+
+            results.append(result)
+
+        await sender
+        self.writer.close()
+        return results
+
+if __name__ == '__main__':
+    # input
+    model = cv2.imread('res/input/target.jpg')
+    bullseye_point = (325,309)
+    inner_diameter_px = 50
+    rings_amount = 6
+    host = '127.0.0.1'
+    port = 8765
+
+    async def serve():
+        target_model = TargetModel(model, bullseye_point, rings_amount, inner_diameter_px)
+        server = AnalysisServer(target_model)
+        await server.start(host, port)
+        print('Listening on ' + host + ':' + str(port))
+        await server.server.serve_forever()
+
+    asyncio.run(serve())
\ No newline at end of file
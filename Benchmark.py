@@ -0,0 +1,416 @@
+from VideoAnalyzer import VideoAnalyzer
+from TargetModel import TargetModel
+from PoseFilter import PoseFilter
+import ContourClassifier as cntr
+from AnalysisConfig import AnalysisConfig
+from FramePool import FramePool
+import HomographicMatcher as matcher
+import HitsManager as hitsMngr
+import Geometry2D as geo2D
+import numpy as np
+import tracemalloc
+import time
+import sys
+import os
+import cv2
+
+def benchmark_pose_smoothing(videoPath, targetModel, smoothingValues):
+    '''
+    Analyze a video once for each smoothing value of the pose filter,
+    and measure how much tracking work the jitter of the hits causes.
+
+    Parameters:
+        {String} videoPath - The path of the video to analyze
+        {TargetModel} targetModel - The target that appears in the video
+        {List} smoothingValues - [
+                                    {Number} A smoothing value to test (1 for no smoothing)
+                                    ...
+                                 ]
+    '''
+
+    print('smoothing | mean candidates | max candidates | created candidates | redundant hits | verified | sec')
+
+    for smoothing in smoothingValues:
+        analyzer = VideoAnalyzer(videoPath, targetModel)
+        analyzer.pose_filter = PoseFilter(smoothing, 25)
+        candidates_amount = []
+        start = time.time()
+
+        while True:
+            ret, frame = analyzer.cap.read()
+            if not ret:
+                break
+
+            result = analyzer.process_frame(frame)
+            candidates_amount.append(len(result['candidates']))
+
+        tracker = analyzer.hits_tracker
+        analyzer.cap.release()
+        print(smoothing, '|', round(np.mean(candidates_amount), 2), '|', max(candidates_amount), '|',
+              tracker.created_candidates, '|', tracker.redundant_hits, '|', len(tracker.verified_hits), '|',
+              round(time.time() - start, 2))
+
+def current_rss():
+    '''
+    Returns:
+        {Number} The current resident set size of the process [MB], or 0 if it's unavailable.
+    '''
+
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        return 0
+
+def benchmark_allocations(videoPath, targetModel, frames):
+    '''
+    Measure the memory allocated during each frame's analysis,
+    with and without reusing the frame buffers.
+
+    Parameters:
+        {String} videoPath - The path of the video to analyze
+        {TargetModel} targetModel - The target that appears in the video
+        {Number} frames - Amount of frames to analyze in each run
+    '''
+
+    print('buffers | allocated per frame [MB] | RSS [MB] | sec')
+
+    for reuse in [False, True]:
+        analyzer = VideoAnalyzer(videoPath, targetModel)
+        analyzer.buffers = FramePool(reuse)
+        allocated = []
+        rss = []
+        start = time.time()
+        tracemalloc.start()
+
+        for _ in range(frames):
+            ret, frame = analyzer.cap.read()
+            if not ret:
+                break
+
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            analyzer.process_frame(frame)
+            _, peak = tracemalloc.get_traced_memory()
+            allocated.append((peak - before) / 2 ** 20)
+            rss.append(current_rss())
+
+        tracemalloc.stop()
+        analyzer.cap.release()
+
+        # skip the first frame, which allocates the pool
+        print('reused' if reuse else 'fresh', '|', round(np.mean(allocated[1:]), 2), '|',
+              round(np.mean(rss[1:]), 1), '|', round(time.time() - start, 2))
+
+def create_fragments_image(shape, fragments, seed=0):
+    '''
+    Draw random projectile fragments (short thick lines and a few arcs) on a blank image.
+
+    Parameters:
+        {Tuple} shape - The shape of the image
+        {Number} fragments - Amount of fragments to draw
+        {Number} seed - The seed of the random generator
+
+    Returns:
+        {Numpy.array} The image with the fragments [grayscale].
+    '''
+
+    rng = np.random.default_rng(seed)
+    img = np.zeros(shape[:2], np.uint8)
+    img_h, img_w = shape[:2]
+
+    for i in range(fragments):
+        x, y = int(rng.integers(0, img_w)), int(rng.integers(0, img_h))
+
+        # every tenth fragment is curved
+        if i % 10 == 0:
+            start_angle = int(rng.integers(0, 360))
+            cv2.ellipse(img, (x, y), (40, 40), 0, start_angle, start_angle + 120, 0xff, 5)
+        else:
+            angle = rng.uniform(0, np.pi)
+            length = rng.integers(15, 80)
+            end = (int(x + length * np.cos(angle)), int(y + length * np.sin(angle)))
+            cv2.line(img, (x, y), end, 0xff, 5)
+
+    return img
+
+def benchmark_contours(shape, fragmentAmounts, repeats):
+    '''
+    Measure the contour filtering and extension stages on frames with many projectile fragments,
+    comparing the batched extension with extending each contour on its own.
+
+    Parameters:
+        {Tuple} shape - The shape of the synthetic frames
+        {List} fragmentAmounts - [
+                                    {Number} An amount of fragments to draw in a frame
+                                    ...
+                                 ]
+        {Number} repeats - Amount of times to repeat each measurement
+    '''
+
+    print('fragments | contours | straight | filter [ms] | extend batched [ms] | extend one by one [ms]')
+    bullseye = (shape[1] / 2, shape[0] / 2)
+    length = min(shape[:2]) / 2
+    config = AnalysisConfig()
+
+    for fragments in fragmentAmounts:
+        img = create_fragments_image(shape, fragments)
+        contours = cv2.findContours(img, cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)[-2:][0]
+        canvas = np.zeros(img.shape, img.dtype)
+
+        start = time.time()
+        for _ in range(repeats):
+            straight = cntr.filter_convex_contours(contours, config.contour_samples, config.contour_min_length,
+                                                   config.contour_min_elongation)
+
+        filter_time = time.time()
+        for _ in range(repeats):
+            cntr.extend_contour_lines(canvas, straight, bullseye, length)
+
+        batched_time = time.time()
+        for _ in range(repeats):
+            for cont in straight:
+                cntr.extend_contour_lines(canvas, [cont], bullseye, length)
+
+        end = time.time()
+        print(fragments, '|', len(contours), '|', len(straight), '|',
+              round((filter_time - start) / repeats * 1000, 2), '|',
+              round((batched_time - filter_time) / repeats * 1000, 2), '|',
+              round((end - batched_time) / repeats * 1000, 2))
+
+def benchmark_stage_threads(videoPath, targetModel, frames, threadAmounts):
+    '''
+    Measure the latency of a single frame's analysis,
+    with and without running its independent stages simultaneously.
+
+    Parameters:
+        {String} videoPath - The path of the video to analyze
+        {TargetModel} targetModel - The target that appears in the video
+        {Number} frames - Amount of frames to analyze in each run
+        {List} threadAmounts - [
+                                  {Number} An amount of stage threads to test (0 to run the stages in turn)
+                                  ...
+                               ]
+    '''
+
+    print('stage threads | mean latency [ms] | p95 latency [ms] | reduction')
+    sequential_latency = None
+
+    for threads in threadAmounts:
+        analyzer = VideoAnalyzer(videoPath, targetModel)
+        latencies = []
+
+        if threads:
+            analyzer.use_stage_threads(threads)
+
+        for _ in range(frames):
+            ret, frame = analyzer.cap.read()
+            if not ret:
+                break
+
+            start = time.perf_counter()
+            analyzer.process_frame(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        analyzer.release_stage_threads()
+        analyzer.cap.release()
+
+        # skip the first frame, which fits the model and allocates the buffers
+        mean_latency = np.mean(latencies[1:])
+
+        if sequential_latency == None:
+            sequential_latency = mean_latency
+
+        reduction = 1 - mean_latency / sequential_latency
+        print(threads, '|', round(mean_latency, 2), '|', round(np.percentile(latencies[1:], 95), 2), '|',
+              str(round(reduction * 100, 1)) + '%')
+
+def benchmark_redundancy(hitAmounts, distanceTolerance=30, minVerifiedReputation=15):
+    '''
+    Measure the verification of hits in sessions with many verified hits,
+    where a part of the hits are detected again a little off their first position.
+
+    Parameters:
+        {List} hitAmounts - [
+                               {Number} An amount of hits to shoot in a session
+                               ...
+                            ]
+        {Number} distanceTolerance - Amount of pixels around a hit that can be ignored
+                                     in order to consider another hit as the same one
+        {Number} minVerifiedReputation - The minimum reputation needed to verify a hit
+    '''
+
+    print('hits | verified | redundant | sort per hit [us] | duplicates left')
+    rng = np.random.default_rng(0)
+    bullseye = (0, 0)
+
+    for hits_amount in hitAmounts:
+        tracker = hitsMngr.HitsTracker()
+        side = int(np.ceil(np.sqrt(hits_amount)))
+        promotion_time = 0
+
+        for i in range(hits_amount):
+            # spread the hits far apart, and shoot every fifth hit near a previous one
+            if i % 5 == 4:
+                x, y = tracker.verified_hits[int(rng.integers(len(tracker.verified_hits)))].point
+                x, y = x + int(rng.integers(-10, 11)), y + int(rng.integers(-10, 11))
+            else:
+                x, y = (i % side) * distanceTolerance * 3, (i // side) * distanceTolerance * 3
+
+            for _ in range(minVerifiedReputation):
+                hit = hitsMngr.Hit(x, y, 10, bullseye)
+                start = time.perf_counter()
+                tracker.sort_hit(hit, distanceTolerance, minVerifiedReputation)
+                promotion_time += time.perf_counter() - start
+
+            tracker.discharge_hits()
+
+        verified = tracker.verified_hits
+        duplicates = sum(geo2D.euclidean_dist(a.point, b.point) < distanceTolerance
+                         for i, a in enumerate(verified) for b in verified[i + 1:])
+
+        print(hits_amount, '|', len(verified), '|', tracker.redundant_hits, '|',
+              round(promotion_time / hits_amount * 10 ** 6, 2), '|', duplicates)
+
+def benchmark_homography(videoPath, targetModel, frames, methods, threshold=5, ratio=.7):
+    '''
+    Measure the estimation time and accuracy of the model's homography with each robust estimator,
+    with and without verifying the previous frame's homography first.
+    The accuracy is measured against a slow and accurate estimation of each frame's homography.
+
+    Parameters:
+        {String} videoPath - The path of the video to analyze
+        {TargetModel} targetModel - The target that appears in the video
+        {Number} frames - Amount of frames to analyze
+        {List} methods - [
+                            {String} The name of an estimator to test (see HomographicMatcher.ESTIMATORS)
+                            ...
+                         ]
+        {Number} threshold - The maximum reprojection error of an inlier [px]
+        {Number} ratio - The ratio threshold of the feature matches
+    '''
+
+    cap = cv2.VideoCapture(videoPath)
+    sift = cv2.xfeatures2d.SIFT_create()
+    reference_method = matcher.ESTIMATORS.get('usac_accurate', cv2.RANSAC)
+    samples = []
+
+    # the features and the matches of each frame are the same for all estimators
+    for _ in range(frames):
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        anchor_points, _, model_keys, model_desc = targetModel.fit(frame.shape)
+        train_keys, train_desc = sift.detectAndCompute(frame, None)
+        matches = matcher.ratio_match_features(model_desc, train_desc, ratio) or []
+
+        if len(matches) >= 4:
+            src_pts, dst_pts = matcher.match_points(model_keys, train_keys, matches)
+            reference, _ = cv2.findHomography(src_pts, dst_pts, reference_method, threshold, maxIters=10000)
+
+            if type(reference) != type(None):
+                corners = cv2.perspectiveTransform(anchor_points, reference)
+                samples.append((model_keys, train_keys, matches, anchor_points, corners))
+
+    cap.release()
+    print('method | seeded | mean [ms] | p95 [ms] | corners error [px] | inlier ratio')
+
+    for method in methods:
+        for seeded in [False, True]:
+            durations = []
+            errors = []
+            inlier_ratios = []
+            seed = None
+
+            for model_keys, train_keys, matches, anchor_points, reference_corners in samples:
+                start = time.perf_counter()
+                H, mask = matcher.calc_homography(model_keys, train_keys, matches, threshold, method,
+                                                  seed if seeded else None)
+
+                durations.append((time.perf_counter() - start) * 1000)
+                seed = H
+
+                if type(H) != type(None):
+                    corners = cv2.perspectiveTransform(anchor_points, H)
+                    errors.append(np.mean(np.linalg.norm((corners - reference_corners).reshape(-1, 2), axis=1)))
+                    inlier_ratios.append(np.count_nonzero(mask) / len(matches))
+
+            print(method, '|', seeded, '|', round(np.mean(durations), 3), '|',
+                  round(np.percentile(durations, 95), 3), '|', round(np.median(errors), 2), '|',
+                  round(np.mean(inlier_ratios), 3))
+
+def benchmark_candidates(frames, spuriousPerFrame, capacities, distanceTolerance=30, minVerifiedReputation=15):
+    '''
+    Measure the tracking cost of each frame along a long session with many spurious detections,
+    with and without bounding the amount of candidate hits.
+    Spurious detections appear in random places, and each of them flickers for a while
+    (detected in about half of the frames), so many of them stay alive as candidates.
+
+    Parameters:
+        {Number} frames - Amount of frames in the session
+        {Number} spuriousPerFrame - Amount of new flickering spots in each frame
+        {List} capacities - [
+                               {Number} A capacity of the candidates to test (None for no limit)
+                               ...
+                            ]
+        {Number} distanceTolerance - Amount of pixels around a hit that can be ignored
+                                     in order to consider another hit as the same one
+        {Number} minVerifiedReputation - The minimum reputation needed to verify a hit
+    '''
+
+    print('capacity | frames | tracking per frame [ms] | candidates | evicted | expired | promoted')
+    bullseye = (0, 0)
+    window = frames // 4
+
+    for capacity in capacities:
+        tracker = hitsMngr.HitsTracker(capacity, None if capacity == None else minVerifiedReputation * 20)
+        rng = np.random.default_rng(0)
+        spots = []
+        duration = 0
+
+        for frame_index in range(1, frames + 1):
+            # each spot flickers until its last frame
+            spots += [(int(rng.integers(0, 20000)), int(rng.integers(0, 20000)), frame_index + int(rng.integers(1, 400)))
+                      for _ in range(spuriousPerFrame)]
+
+            spots = [spot for spot in spots if spot[2] > frame_index]
+            detected = [spot for spot in spots if rng.random() < .5]
+            start = time.perf_counter()
+
+            for x, y, _ in detected:
+                tracker.sort_hit(hitsMngr.Hit(x, y, 0, bullseye), distanceTolerance, minVerifiedReputation)
+
+            tracker.discharge_hits()
+            duration += time.perf_counter() - start
+
+            if frame_index % window == 0:
+                metrics = tracker.get_metrics()
+                print(capacity, '|', frame_index, '|', round(duration / window * 1000, 3), '|',
+                      metrics['candidates'], '|', metrics['evicted_candidates'], '|',
+                      metrics['expired_candidates'], '|', metrics['promoted_candidates'])
+
+                duration = 0
+
+if __name__ == '__main__':
+    # input
+    model = cv2.imread('res/input/target.jpg')
+    video_name = sys.argv[2] if len(sys.argv) > 2 else 'res/input/video.mp4'
+    bullseye_point = (325,309)
+    inner_diameter_px = 50
+    rings_amount = 6
+    target_model = TargetModel(model, bullseye_point, rings_amount, inner_diameter_px)
+
+    benchmarks = {
+        'pose': lambda: benchmark_pose_smoothing(video_name, target_model, [1, .5, .3, .1]),
+        'allocations': lambda: benchmark_allocations(video_name, target_model, 100),
+        'contours': lambda: benchmark_contours((1080, 1920, 3), [50, 200, 800], 20),
+        'threads': lambda: benchmark_stage_threads(video_name, target_model, 100, [0, 2, 3]),
+        'redundancy': lambda: benchmark_redundancy([100, 500, 2000]),
+        'homography': lambda: benchmark_homography(video_name, target_model, 300,
+                                                   [m for m in ['ransac', 'usac_fast', 'usac_magsac']
+                                                    if m in matcher.ESTIMATORS]),
+        'candidates': lambda: benchmark_candidates(8000, 1, [None, 100])
+    }
+
+    benchmarks[sys.argv[1]]()
\ No newline at end of file
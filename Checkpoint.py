@@ -0,0 +1,49 @@
+import json
+import os
+
+def save(path, state):
+    '''
+    Write a checkpoint file.
+    The file is replaced atomically, so a crash while writing never leaves a broken checkpoint.
+
+    Parameters:
+        {String} path - The path of the checkpoint file
+        {Dictionary} state - The state to save, consisting only of lists, numbers, strings and booleans
+    '''
+
+    temp_path = path + '.tmp'
+
+    with open(temp_path, 'w') as file:
+        json.dump(state, file, separators=(',', ':'))
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temp_path, path)
+
+def load(path):
+    '''
+    Parameters:
+        {String} path - The path of the checkpoint file
+
+    Returns:
+        {Dictionary} The saved state, or None if the file does not exist.
+    '''
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as file:
+        return json.load(file)
+
+def segment_path(outputName, segment):
+    '''
+    Parameters:
+        {String} outputName - The path of the complete output file
+        {Number} segment - The index of the segment
+
+    Returns:
+        {String} The path of a single segment of the output (e.g. 'output_003.mp4').
+    '''
+
+    base, extension = os.path.splitext(outputName)
+    return base + '_' + str(segment).zfill(3) + extension
\ No newline at end of file
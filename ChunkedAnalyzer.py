@@ -0,0 +1,180 @@
+from concurrent.futures import ProcessPoolExecutor
+from VideoAnalyzer import VideoAnalyzer
+from TargetModel import TargetModel
+import Geometry2D as geo2D
+import time
+import cv2
+import os
+
+def _analyze_chunk(chunk):
+    '''
+    Analyze a single chunk of a video in a separate process, with its own hits tracking.
+    The chunk is analyzed from the beginning of its overlap window, so that the reputation
+    of the hits that already exist can build up, but only the hits that are verified
+    are reported.
+
+    Parameters:
+        {Tuple} chunk - (
+                           {String} The path of the video,
+                           {Tuple} The arguments of the TargetModel,
+                           {Number} The index of the first frame of the overlap window,
+                           {Number} The index of the first frame of the chunk,
+                           {Number} The index of the frame after the chunk's last frame
+                        )
+
+    Returns:
+        {List} [
+                  {Tuple} (
+                             {Number} The index of the frame in which the hit was first verified
+                                      (the chunk's first frame for hits verified during the overlap),
+                             {Number} x coordinate of the hit relative to the bull'seye point,
+                             {Number} y coordinate of the hit relative to the bull'seye point,
+                             {Number} The hit's score
+                          )
+                  ...
+               ]
+    '''
+
+    video_path, target_args, warm_start, start, end = chunk
+
+    # the chunks already run in parallel
+    cv2.setNumThreads(1)
+
+    analyzer = VideoAnalyzer(video_path, TargetModel(*target_args))
+    analyzer.cap.set(cv2.CAP_PROP_POS_FRAMES, warm_start)
+    known_hits = set()
+    verified_events = []
+
+    for frame_index in range(warm_start, end):
+        ret, frame = analyzer.cap.read()
+        if not ret:
+            break
+
+        result = analyzer.process_frame(frame)
+
+        # the hits themselves are kept, so that the id of a discarded hit is never mistaken for a new one's
+        for hit in result['verified']:
+            if hit not in known_hits:
+                known_hits.add(hit)
+                x_rel = hit.point[0] - hit.bullseye_relation[0]
+                y_rel = hit.point[1] - hit.bullseye_relation[1]
+                verified_events.append((max(frame_index, start), float(x_rel), float(y_rel), int(hit.score)))
+
+    analyzer.cap.release()
+    return verified_events
+
+def merge_chunks(chunkEvents, distanceTolerance):
+    '''
+    Merge the verified hits of all chunks into a single consistent set of hits.
+    A hit that's within the distance tolerance of an already known hit
+    (relative to the bull'seye point) is the same hit, seen again by a later chunk.
+
+    Parameters:
+        {List} chunkEvents - [
+                                {List} The product of _analyze_chunk for a single chunk
+                                ...
+                             ] (ordered by the chunks' position in the video)
+        {Number} distanceTolerance - Amount of pixels around a point that can be ignored
+                                     in order to consider another point as the same one
+
+    Returns:
+        {Tuple} (
+                   {List} [
+                              {Dictionary} {
+                                              'frame': {Number} The frame in which the hit was verified,
+                                              'x': {Number} x coordinate relative to the bull'seye point,
+                                              'y': {Number} y coordinate relative to the bull'seye point,
+                                              'score': {Number} The hit's score
+                                           }
+                              ...
+                          ],
+                   {List} [
+                              {Tuple} (
+                                         {Number} The frame from which the scoreboard holds,
+                                         {Number} Amount of arrows on the target,
+                                         {Number} The total score
+                                      )
+                              ...
+                          ]
+                )
+    '''
+
+    hits = []
+
+    for events in chunkEvents:
+        for frame_index, x_rel, y_rel, score in sorted(events):
+            duplicate = any(geo2D.euclidean_dist((x_rel, y_rel), (h['x'], h['y'])) <= distanceTolerance
+                            for h in hits)
+
+            if not duplicate:
+                hits.append({ 'frame': frame_index, 'x': x_rel, 'y': y_rel, 'score': score })
+
+    # the scoreboard changes whenever a new hit is verified
+    hits.sort(key=lambda h: h['frame'])
+    timeline = []
+    total_score = 0
+
+    for i, hit in enumerate(hits):
+        total_score += hit['score']
+
+        if len(timeline) and timeline[-1][0] == hit['frame']:
+            timeline[-1] = (hit['frame'], i + 1, total_score)
+        else:
+            timeline.append((hit['frame'], i + 1, total_score))
+
+    return hits, timeline
+
+def analyze_chunked(videoPath, targetArgs, workers=None, overlap=120, distanceTolerance=30):
+    '''
+    Analyze a single video in parallel, by splitting it into time chunks
+    that are analyzed in separate processes, and stitching their results together.
+
+    Parameters:
+        {String} videoPath - The path of the video to analyze
+        {Tuple} targetArgs - (
+                                {Numpy.array} An image of the target that appears in the video,
+                                {Tuple} The bull'seye location in the model image,
+                                {Number} Amount of rings in the target,
+                                {Number} The diameter of the most inner ring in the target image [px]
+                             )
+        {Number} workers - Amount of processes (and chunks) to use (defaults to the amount of CPU cores)
+        {Number} overlap - Amount of frames before each chunk that are analyzed only to warm up its hits' reputation
+        {Number} distanceTolerance - Amount of pixels around a point that can be ignored
+                                     in order to consider another point as the same one
+
+    Returns:
+        {Tuple} The product of merge_chunks.
+    '''
+
+    workers = workers or os.cpu_count()
+    cap = cv2.VideoCapture(videoPath)
+    frames_amount = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    chunk_size = max(1, -(-frames_amount // workers))
+    chunks = []
+
+    for start in range(0, frames_amount, chunk_size):
+        end = min(start + chunk_size, frames_amount)
+        chunks.append((videoPath, targetArgs, max(0, start - overlap), start, end))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunk_events = list(executor.map(_analyze_chunk, chunks))
+
+    return merge_chunks(chunk_events, distanceTolerance)
+
+if __name__ == '__main__':
+    # input
+    model = cv2.imread('res/input/target.jpg')
+    video_name = 'res/input/video.mp4'
+    bullseye_point = (325,309)
+    inner_diameter_px = 50
+    rings_amount = 6
+
+    start = time.time()
+    hits, timeline = analyze_chunked(video_name, (model, bullseye_point, rings_amount, inner_diameter_px))
+
+    for frame_index, arrows_amount, total_score in timeline:
+        print('Frame ' + str(frame_index) + ': ' + str(arrows_amount) + ' arrows, total score ' + str(total_score))
+
+    print('Analyzed in ' + str(round(time.time() - start, 2)) + ' seconds.')
\ No newline at end of file
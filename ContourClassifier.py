@@ -36,15 +36,19 @@ def contour_distances_from(contour, point):
     
     return sorted(pts, key=lambda x: x[2])
 
-def extend_contour_line(img, contour, bullseye, length):
+def extend_contour_lines(img, contours, bullseye, length):
     '''
-    Extend the straight contour line owtwards the target, to try and reproduce the shape and length of the actual projectile.
+    Extend the straight contour lines owtwards the target, to try and reproduce the shape and length of the actual projectiles.
     This helps joining multiple contours, that refer to the same projectile, in a row.
+    All contours are processed together and drawn in a single call.
     This function modifies the argument image.
 
     Parameters:
-        {Numpy.array} img - The image in which the the contour appears
-        {Numpy.array} conour - The contour to extend
+        {Numpy.array} img - The image in which the the contours appear
+        {List} contours - [
+                             {Numpy.array} A contour to extend
+                             ...
+                          ]
         {Tuple} bullseye - (
                               {Number} x coordinate of the bull'seye point,
                               {Number} y coordinate of the bull'seye point
@@ -52,126 +56,126 @@ def extend_contour_line(img, contour, bullseye, length):
         {Number} length - The extension's length (outwards the target)
     '''
 
-    def normalize(vector):
-        square_sum = 0
-        for x in vector:
-            square_sum += x ** 2
+    if not len(contours):
+        return
 
-        magnitude = square_sum ** .5
-        return np.array(vector) / magnitude
-
-    # find a rectangle that strictly bounds the contour
-    bounding_rect = cv2.minAreaRect(contour)
-    box = cv2.boxPoints(bounding_rect)
-    box = np.int0(box)
-    A = box[0]
-    B = box[1]
-    C = box[2]
-    D = box[3]
+    # find the rectangles that strictly bound the contours [shape: (contours, 4, 2)]
+    boxes = np.stack([cv2.boxPoints(cv2.minAreaRect(cont)) for cont in contours]).astype(np.int32)
+    A, B, C, D = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
 
     # find the two shorter edges
-    AB = geo2D.euclidean_dist(A, B)
-    BC = geo2D.euclidean_dist(B, C)
-
-    if AB < BC:
-        edge_1_pts = (A,B)
-        edge_2_pts = (C,D)
-    else:
-        edge_1_pts = (B,C)
-        edge_2_pts = (A,D)
+    AB = np.linalg.norm(A - B, axis=1)
+    BC = np.linalg.norm(B - C, axis=1)
+    ab_shorter = (AB < BC)[:, np.newaxis]
+    edge_1_pts = (np.where(ab_shorter, A, B), np.where(ab_shorter, B, C))
+    edge_2_pts = (np.where(ab_shorter, C, A), D)
 
     # calculate the middle points of the two edges
-    alpha = (int((edge_1_pts[0][0] + edge_1_pts[1][0]) / 2),int((edge_1_pts[0][1] + edge_1_pts[1][1]) / 2))
-    beta = (int((edge_2_pts[0][0] + edge_2_pts[1][0]) / 2),int((edge_2_pts[0][1] + edge_2_pts[1][1]) / 2))
+    alpha = np.trunc((edge_1_pts[0] + edge_1_pts[1]) / 2)
+    beta = np.trunc((edge_2_pts[0] + edge_2_pts[1]) / 2)
 
     # decide which edge is closer to the target's bulls'eye point
-    alpha_dist = geo2D.euclidean_dist(alpha, bullseye)
-    beta_dist = geo2D.euclidean_dist(beta, bullseye)
-    front_point = alpha if alpha_dist < beta_dist else beta
-    rear_point = beta if alpha_dist < beta_dist else alpha
-
-    # calculate the estimated point of the projectile's back
-    direction = normalize(np.array(rear_point) - np.array(front_point))
-    end_point = np.array(front_point) + direction * length
-    end_point = end_point.tolist()
-    end_point = tuple([int(x) for x in end_point])
-
-    # extend the line
-    cv2.line(img, front_point, end_point, (0xff,0x0,0xff), 4)
-
-def is_contour_rect(contour, A, B, samples):
+    bullseye = np.float64([bullseye[0], bullseye[1]])
+    alpha_closer = (np.linalg.norm(alpha - bullseye, axis=1) < np.linalg.norm(beta - bullseye, axis=1))[:, np.newaxis]
+    front_points = np.where(alpha_closer, alpha, beta)
+    rear_points = np.where(alpha_closer, beta, alpha)
+
+    # calculate the estimated point of the projectiles' back
+    directions = rear_points - front_points
+    magnitudes = np.linalg.norm(directions, axis=1)
+    valid = magnitudes > 0
+    end_points = front_points[valid] + directions[valid] / magnitudes[valid, np.newaxis] * length
+
+    # extend the lines
+    lines = np.stack([front_points[valid], np.trunc(end_points)], axis=1).astype(np.int32)
+    cv2.polylines(img, list(lines.reshape(-1, 2, 1, 2)), False, (0xff,0x0,0xff), 4)
+
+def find_farthest_points(contours):
     '''
-    Check if a contour is a rectangular or is it convexed (moon-shaped).
+    Find two points that are far apart on each of the contours.
+    Starting from the first point of a contour, the point furthest from it is taken,
+    and then the point furthest from that one.
 
     Parameters:
-        {Numpy.array} cont - The contour to check
-        {tuple} A - Point from one edge of the contour
-                    (
-                        {Number} x coordinate of the point
-                        {Number} y coordinate of the point
-                    )
-        {tuple} B - Point from the other edge of the contour
-                    (
-                        {Number} x coordinate of the point
-                        {Number} y coordinate of the point
-                    )
-        {Number} samples - Amount of samples to take.
-                           The more samples, the more precise and reliable is the result.
+        {List} contours - [
+                             {Numpy.array} A contour
+                             ...
+                          ]
 
     Returns:
-        {Boolean} True if the contour is more of a rectangle than a convex shape.
+        {Tuple} (
+                   {Numpy.array} The first point of each contour [shape: (contours, 2)],
+                   {Numpy.array} The second point of each contour [shape: (contours, 2)]
+                )
     '''
 
-    x_distance = B[0] - A[0]
-    y_distance = B[1] - A[1]
-    x_step = x_distance / samples
-    y_step = y_distance / samples
-
-    # contour is a very small square
-    if (x_step == 0 or y_step == 0):
-        return False
+    lengths = np.int64([len(c) for c in contours])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    ids = np.repeat(np.arange(len(contours)), lengths)
+    pts = np.concatenate([c.reshape(-1, 2) for c in contours]).astype(np.float32)
 
-    x_vals = np.arange(A[0], B[0], x_step)
-    y_vals = np.arange(A[1], B[1], y_step)
-    points = [(x,y) for x, y in zip(x_vals, y_vals)]
+    def furthest_from(origins):
+        dists = ((pts - origins[ids]) ** 2).sum(axis=1)
+        is_max = dists == np.maximum.reduceat(dists, starts)[ids]
+        max_ids, first_max = np.unique(ids[is_max], return_index=True)
+        return pts[np.flatnonzero(is_max)[first_max]]
 
-    for p in points:
-        # check if point is outside the contour
-        if cv2.pointPolygonTest(contour, p, False) < 0:
-            return False
+    point_B = furthest_from(pts[starts])
+    point_A = furthest_from(point_B)
+    return point_A, point_B
 
-    return True
-
-def filter_convex_contours(contours):
+def filter_convex_contours(contours, samples, minLength, minElongation):
     '''
     Take a list of contours and filter out all the contours with a convex shape.
+    A contour is considered straight if the segment between its two furthest points
+    lies inside of it.
 
     Parameters:
         {List} contours - [
                              {Numpy.array} A contour to test
                              ...
                           ]
+        {Number} samples - Amount of points to test along the segment of each contour.
+                           The more samples, the more precise and reliable is the result.
+        {Number} minLength - The minimum length of the contour's bounding rectangle [px]
+        {Number} minElongation - The minimum ratio between the length and the width
+                                 of the contour's bounding rectangle
 
     Returns:
         {List} The same list, but without the convex shaped contours.
     '''
 
-    filtered = []
+    # reject small and stubby contours before any sampling
+    candidates = []
 
     for cont in contours:
-        contPts = [(cont[m][0][0],cont[m][0][1]) for m in range(len(cont))]
-        point_A = contPts[0] # some random point on the contour
+        _, (rect_w, rect_h), _ = cv2.minAreaRect(cont)
+        length, width = max(rect_w, rect_h), min(rect_w, rect_h)
+
+        if length >= minLength and length >= minElongation * max(width, 1):
+            candidates.append(cont)
+
+    if not len(candidates):
+        return []
 
-        # find the two furthest points on the contour
-        point_B = contour_distances_from(contPts, point_A)[::-1][0]
-        point_A = contour_distances_from(contPts, point_B)[::-1][0]
+    # sample points along the segment between the two furthest points of each contour
+    point_A, point_B = find_farthest_points(candidates)
+    steps = np.arange(samples, dtype=np.float32) / samples
+    sample_pts = point_A[:, np.newaxis, :] + steps[np.newaxis, :, np.newaxis] * (point_B - point_A)[:, np.newaxis, :]
+    sample_pts = np.rint(sample_pts).astype(np.int32)
+
+    filtered = []
 
-        # calculate the point between the two
-        point_C = ((point_A[0] + point_B[0]) / 2, (point_A[1] + point_B[1]) / 2)
+    for cont, pts in zip(candidates, sample_pts):
+        # rasterize the contour alone within its bounding rectangle,
+        # so that nested and overlapping contours do not hide each other
+        x, y, w, h = cv2.boundingRect(cont)
+        mask = np.zeros((h, w), np.uint8)
+        cv2.drawContours(mask, [cont], 0, 1, cv2.FILLED, offset=(-x, -y))
 
-        # if this point is outside the contour, it's convex,
-        # if it's inside it, the contour is relatively straight
-        if is_contour_rect(cont, point_A, point_B, 5):
+        # if all sampled points are inside the contour, it's relatively straight,
+        # otherwise it's convex
+        if mask[pts[:, 1] - y, pts[:, 0] - x].all():
             filtered.append(cont)
 
     return filtered
\ No newline at end of file
@@ -1,5 +1,16 @@
+import time
+
+# the time to the first result includes the imports
+start_time = time.time()
+
 from VideoAnalyzer import VideoAnalyzer
+from TargetModel import TargetModel
+from SceneMonitor import SceneMonitor
 from Sketcher import Sketcher
+import OverlayRenderer
+import HitsManager as hitsMngr
+import FrameCache
+import datetime
 import cv2
 
 # input
@@ -10,20 +21,51 @@ inner_diameter_px = 50
 inner_diameter_inch = 1.5
 rings_amount = 6
 display_in_cm = False
+checkpoint_path = None
+resume = False
+fast_forward = False
+end_arrows = None
+stage_cache_dir = None
+stage_threads = 0
+results_path = None
+render_only = False
+results_db_path = None
+archer_name = 'archer'
+target_type = 'default'
 
-# get a sample frame from the video
-cap = cv2.VideoCapture(video_name)
-_, test_sample = cap.read()
-
-# calculate the sizes of the frame and the input
-model_h, model_w, _ = model.shape
-frame_h, frame_w, _ = test_sample.shape
+# calculate the measure unit
 pixel_to_inch = inner_diameter_inch / inner_diameter_px
 pixel_to_cm = pixel_to_inch * 2.54
 measure_unit = pixel_to_cm if display_in_cm else pixel_to_inch
 measure_unit_name = 'cm' if display_in_cm else '"'
 
-# analyze
 sketcher = Sketcher(measure_unit, measure_unit_name)
-video_analyzer = VideoAnalyzer(video_name, model, bullseye_point, rings_amount, inner_diameter_px)
-video_analyzer.analyze('res/output/output.mp4', sketcher)
\ No newline at end of file
+
+# only draw the stored results again (e.g. after changing the measure unit)
+if render_only:
+    OverlayRenderer.render(video_name, results_path, 'res/output/output.mp4', sketcher)
+    exit()
+
+# analyze
+target_model = TargetModel(model, bullseye_point, rings_amount, inner_diameter_px)
+video_analyzer = VideoAnalyzer(video_name, target_model)
+video_analyzer.stage_cache = FrameCache.StageCache(stage_cache_dir, video_name, target_model) if stage_cache_dir != None else None
+
+if stage_threads:
+    video_analyzer.use_stage_threads(stage_threads)
+
+scene_monitor = SceneMonitor(endArrows=end_arrows) if fast_forward else None
+video_analyzer.analyze('res/output/output.mp4', sketcher, checkpoint_path, resume=resume, sceneMonitor=scene_monitor,
+                       resultsPath=results_path)
+
+# keep the session's final scoreboard along with all previous sessions
+if results_db_path != None:
+    from ResultsStore import ResultsStore
+
+    store = ResultsStore(results_db_path)
+    store.add_session(archer_name, datetime.date.today(), target_type, target_model,
+                      video_analyzer.hits_tracker.get_hits(hitsMngr.VERIFIED), video_name)
+    store.close()
+
+if video_analyzer.first_result_time != None:
+    print('First result after ' + str(round(video_analyzer.first_result_time - start_time, 2)) + ' seconds.')
\ No newline at end of file
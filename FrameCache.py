@@ -0,0 +1,254 @@
+import numpy as np
+import hashlib
+import json
+import sys
+import cv2
+import os
+
+def build(videoPath, cachePath):
+    '''
+    Decode a video once into a raw frame store, which can then be read without decoding.
+    The store consists of the raw frames file ('<cachePath>.raw') and its index file (cachePath).
+
+    Parameters:
+        {String} videoPath - The path of the video to decode
+        {String} cachePath - The path of the index file (e.g. 'clip.fcache')
+
+    Returns:
+        {Number} Amount of frames in the store.
+    '''
+
+    cap = cv2.VideoCapture(videoPath)
+    frames_amount = 0
+    shape = None
+
+    with open(cachePath + '.raw', 'wb') as raw:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            shape = frame.shape
+            raw.write(np.ascontiguousarray(frame).tobytes())
+            frames_amount += 1
+
+    index = {
+        'source': videoPath,
+        'frames': frames_amount,
+        'shape': list(shape) if shape != None else [0, 0, 3],
+        'fps': cap.get(cv2.CAP_PROP_FPS)
+    }
+
+    cap.release()
+
+    with open(cachePath, 'w') as file:
+        json.dump(index, file)
+
+    return frames_amount
+
+def open_capture(path):
+    '''
+    Parameters:
+        {String} path - The path of a video, or of a raw frame store's index file ('.fcache')
+
+    Returns:
+        {Object} A cv2.VideoCapture of the video, or a CachedCapture of the raw frame store.
+    '''
+
+    if path.endswith('.fcache'):
+        return CachedCapture(path)
+    else:
+        return cv2.VideoCapture(path)
+
+class CachedCapture:
+    def __init__(self, cachePath):
+        '''
+        Read the frames of a raw frame store, with the same interface as cv2.VideoCapture.
+        The frames are memory mapped (read only), so they are read without decoding.
+        Each read frame is a copy, which can be drawn on without affecting the store.
+
+        {String} cachePath - The path of the store's index file
+        '''
+
+        with open(cachePath) as file:
+            self.index = json.load(file)
+
+        shape = (self.index['frames'],) + tuple(self.index['shape'])
+
+        if self.index['frames'] > 0:
+            self.frames = np.memmap(cachePath + '.raw', np.uint8, 'r', shape=shape)
+        else:
+            self.frames = np.zeros(shape, np.uint8)
+
+        self.position = 0
+
+    def isOpened(self):
+        return True
+
+    def grab(self):
+        '''
+        Returns:
+            {Boolean} True if there was a frame to skip.
+        '''
+
+        if self.position >= len(self.frames):
+            return False
+
+        self.position += 1
+        return True
+
+    def read(self):
+        '''
+        Returns:
+            {Tuple} (
+                       {Boolean} True if a frame was read,
+                       {Numpy.array} The frame, or None if the store is over
+                    )
+        '''
+
+        if self.position >= len(self.frames):
+            return False, None
+
+        frame = self.frames[self.position].copy()
+        self.position += 1
+        return True, frame
+
+    def get(self, prop):
+        properties = {
+            cv2.CAP_PROP_POS_FRAMES: self.position,
+            cv2.CAP_PROP_FRAME_COUNT: len(self.frames),
+            cv2.CAP_PROP_FRAME_HEIGHT: self.index['shape'][0],
+            cv2.CAP_PROP_FRAME_WIDTH: self.index['shape'][1],
+            cv2.CAP_PROP_FPS: self.index['fps']
+        }
+
+        return properties.get(prop, 0)
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.position = max(0, min(int(value), len(self.frames)))
+            return True
+
+        return False
+
+    def release(self):
+        self.frames = None
+
+def source_fingerprint(path):
+    '''
+    Parameters:
+        {String} path - The path of a video, or of a raw frame store's index file ('.fcache')
+
+    Returns:
+        {Tuple} The identity of the clip (its path, size and modification time,
+                and the index of a raw frame store), which changes whenever the clip changes.
+    '''
+
+    paths = [path, path + '.raw'] if path.endswith('.fcache') else [path]
+    stats = [(os.path.abspath(p), os.path.getsize(p), os.path.getmtime(p)) for p in paths if os.path.exists(p)]
+
+    if path.endswith('.fcache'):
+        with open(path) as file:
+            stats.append(file.read())
+
+    return tuple(stats)
+
+def target_fingerprint(targetModel):
+    '''
+    Parameters:
+        {TargetModel} targetModel - A target model
+
+    Returns:
+        {String} A digest of the target's image and measurements.
+    '''
+
+    digest = hashlib.sha1(np.ascontiguousarray(targetModel.model).tobytes())
+    digest.update(repr((targetModel.model.shape, tuple(targetModel.bullseye), targetModel.rings_amount,
+                        targetModel.inner_diam)).encode())
+
+    return digest.hexdigest()
+
+def state_fingerprint(*arrays):
+    '''
+    Parameters:
+        {Numpy.array} arrays - The state that a product depends on (each of them can be None)
+
+    Returns:
+        {String} A digest of the values of the arrays.
+    '''
+
+    digest = hashlib.sha1()
+
+    for array in arrays:
+        digest.update(b'-' if type(array) == type(None) else np.float64(array).tobytes())
+
+    return digest.hexdigest()
+
+class StageCache:
+    def __init__(self, directory, clipPath, targetModel):
+        '''
+        Store the intermediate products of the analysis of each frame, keyed by the frame's index
+        and by the parameters that the product depends on. Repeated runs over the same clip,
+        that change only later parameters, can then skip the early stages entirely.
+        The products are also keyed by the clip and the target, so a directory can be shared safely.
+        Products that depend on the previous frames should include that state in their parameters
+        (see state_fingerprint), so that a run with another history does not replay them.
+
+        {String} directory - The directory in which the products are saved
+        {String} clipPath - The path of the analyzed clip (a video or a raw frame store)
+        {TargetModel} targetModel - The target that appears in the clip
+        '''
+
+        self.directory = directory
+        self.fingerprint = (source_fingerprint(clipPath), target_fingerprint(targetModel))
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, stage, frameIndex, params):
+        '''
+        Returns:
+            {String} The path of the file of a single product.
+        '''
+
+        params_key = hashlib.sha1(repr((self.fingerprint, params)).encode()).hexdigest()[:12]
+        return os.path.join(self.directory, stage + '-' + params_key + '-' + str(frameIndex) + '.npz')
+
+    def load(self, stage, frameIndex, params):
+        '''
+        Parameters:
+            {String} stage - The name of the analysis stage
+            {Number} frameIndex - The index of the frame in the video
+            {Tuple} params - The parameters that the product depends on
+
+        Returns:
+            {Dictionary} The saved arrays of the product, or None if it's not cached.
+        '''
+
+        path = self._path(stage, frameIndex, params)
+
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path) as product:
+            return dict(product)
+
+    def save(self, stage, frameIndex, params, **arrays):
+        '''
+        Parameters:
+            {String} stage - The name of the analysis stage
+            {Number} frameIndex - The index of the frame in the video
+            {Tuple} params - The parameters that the product depends on
+            {Numpy.array} arrays - The arrays of the product
+        '''
+
+        path = self._path(stage, frameIndex, params)
+        temp_path = path + '.' + str(os.getpid()) + '.tmp'
+
+        # many processes may save the same product at once, so it's replaced atomically
+        with open(temp_path, 'wb') as file:
+            np.savez_compressed(file, **arrays)
+
+        os.replace(temp_path, path)
+
+if __name__ == '__main__':
+    frames_amount = build(sys.argv[1], sys.argv[2])
+    print('Stored ' + str(frames_amount) + ' frames in ' + sys.argv[2])
\ No newline at end of file
@@ -0,0 +1,63 @@
+import numpy as np
+
+class FramePool:
+    def __init__(self, reuse=True):
+        '''
+        A set of named image buffers that are allocated on the first frame and reused
+        by every following frame of the same size, instead of allocating new arrays each time.
+
+        {Boolean} reuse - False to allocate a new buffer on every request (for comparison)
+        '''
+
+        self.reuse = reuse
+        self.buffers = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        '''
+        Parameters:
+            {String} name - The name of the buffer
+            {Tuple} shape - The required shape of the buffer
+            {Type} dtype - The required type of the buffer's values
+
+        Returns:
+            {Numpy.array} A buffer with the requested shape and type.
+                          Its values are left from the last time it was used.
+        '''
+
+        buffer = self.buffers.get(name)
+
+        if not self.reuse or type(buffer) == type(None) or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype)
+            self.buffers[name] = buffer
+
+        return buffer
+
+    def zeros(self, name, shape, dtype=np.uint8):
+        '''
+        Parameters:
+            {String} name - The name of the buffer
+            {Tuple} shape - The required shape of the buffer
+            {Type} dtype - The required type of the buffer's values
+
+        Returns:
+            {Numpy.array} A buffer with the requested shape and type, filled with zeros.
+        '''
+
+        buffer = self.get(name, shape, dtype)
+        buffer.fill(0)
+        return buffer
+
+    def cached(self, name, create):
+        '''
+        Parameters:
+            {Object} name - The name of the cached value
+            {Function} create - A function that creates the value if it's not cached yet
+
+        Returns:
+            {Object} The cached value.
+        '''
+
+        if not self.reuse or name not in self.buffers:
+            self.buffers[name] = create()
+
+        return self.buffers[name]
\ No newline at end of file
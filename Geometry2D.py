@@ -1,3 +1,4 @@
+from FramePool import FramePool
 import numpy as np
 import cv2
 
@@ -144,7 +145,7 @@ def calc_vertices_and_edges(transform):
 
     return vertices, (ab, bc, cd, da)
 
-def calc_distances_from(matSize, point):
+def calc_distances_from(matSize, point, buffers=None):
     '''
     Create a matrix of distances, where each value is the distance from a given point.
 
@@ -157,14 +158,26 @@ def calc_distances_from(matSize, point):
                            {Number} x coordinate of the parameter point,
                            {Number} y coordinate of the parameter point,
                         )
+        {FramePool} buffers - A pool of buffers to reuse instead of allocating new matrices
     
     Returns:
         {Numpy.array} A matrix of distances.
     '''
 
-    dx = np.arange(matSize[1])
-    dy = np.arange(matSize[0])
-    x, y = point[0], point[1]
-    mat_X, mat_Y = np.meshgrid(dx, dy)
-    distances = ((mat_X, mat_Y), euclidean_dist((mat_X,mat_Y), (x,y)))
+    if buffers == None:
+        buffers = FramePool()
+
+    # the coordinates grid only depends on the size of the matrix
+    def create_grid():
+        dx = np.arange(matSize[1], dtype=np.float32)
+        dy = np.arange(matSize[0], dtype=np.float32)
+        return np.meshgrid(dx, dy)
+
+    mat_size = (matSize[0], matSize[1])
+    mat_X, mat_Y = buffers.cached(('grid', mat_size), create_grid)
+    x, y = float(point[0]), float(point[1])
+    diff_X = cv2.subtract(mat_X, x, dst=buffers.get('dist_x', mat_size, np.float32))
+    diff_Y = cv2.subtract(mat_Y, y, dst=buffers.get('dist_y', mat_size, np.float32))
+    dist = cv2.magnitude(diff_X, diff_Y, magnitude=buffers.get('dist', mat_size, np.float32))
+    distances = ((mat_X, mat_Y), dist)
     return distances
\ No newline at end of file
@@ -1,42 +1,28 @@
-import ContourClassifier as cntr
 import Geometry2D as geo2D
 import numpy as np
 import cv2
 
-def create_group_polygon(img, hits):
+def create_group_polygon(hits):
     '''
     Calculate the polygon that contours a group of hits.
 
     Parameters:
-        {Numpy.array} img - The image in which the group appears
         {List} hits - [
                          {HitsManager.Hit} A hit in the group
                          ...
                       ]
 
     Returns:
-        {Numpy.array} A strict contour around the group of hits,
+        {Numpy.array} The convex hull of the group of hits,
                       or None if the quantity of the hits is too low to form a group.
     '''
 
-    blank_img = np.zeros(img.shape, dtype=img.dtype)
-    blank_img = cv2.cvtColor(blank_img, cv2.COLOR_RGB2GRAY)
-    
-    # draw lines between all hits
-    for h1 in hits:
-        for h2 in hits:
-            if h1 != h2:
-                cv2.line(blank_img, h1.point, h2.point, (0xff,0xff,0xff), 3)
-    
-    # find external contour
-    contours = cv2.findContours(blank_img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)[-2:]
-    blank_img = cv2.cvtColor(blank_img, cv2.COLOR_GRAY2RGB)
-    
-    if len(contours[0]) > 0:
-        return contours[0][0]
-    else:
+    if len(hits) < 2:
         return None
 
+    points = np.int32([h.point for h in hits]).reshape(-1, 1, 2)
+    return cv2.convexHull(points)
+
 def measure_grouping_diameter(contour):
     '''
     Calculate the diameter of a grouping contour.
@@ -48,13 +34,211 @@ def measure_grouping_diameter(contour):
         {Number} The diameter of the grouping contour.
     '''
 
-    # find two furthest points in the polygon
-    contPts = [(contour[m][0][0],contour[m][0][1]) for m in range(len(contour))]
-    point_A = contPts[0] # random point
-    point_B = cntr.contour_distances_from(contPts, point_A)[::-1][0]
-    point_A = cntr.contour_distances_from(contPts, point_B)[::-1][0]
-    
-    # find their distance for each other
-    point_A = (point_A[0], point_A[1])
-    point_B = (point_B[0], point_B[1])
-    return geo2D.euclidean_dist(point_A, point_B)
\ No newline at end of file
+    # the two furthest points of a polygon are always two of its vertices
+    points = np.float32(contour).reshape(-1, 2)
+    deltas = points[:, np.newaxis, :] - points[np.newaxis, :, :]
+    return float(np.sqrt((deltas ** 2).sum(axis=2)).max())
+
+def measure_grouping_spread(hits):
+    '''
+    Calculate the center of a group of hits and how spread they are around it.
+
+    Parameters:
+        {List} hits - [
+                         {HitsManager.Hit} A hit in the group
+                         ...
+                      ]
+
+    Returns:
+        {Tuple} (
+                   {Tuple} (
+                              {Number} x coordinate of the group's center,
+                              {Number} y coordinate of the group's center
+                           ),
+                   {Number} The average distance of the hits from the group's center,
+                   {Number} The distance of the group's center from the bull'seye point
+                )
+    '''
+
+    points = np.float32([h.point for h in hits])
+    bullseye = np.float32([h.bullseye_relation for h in hits]).mean(axis=0)
+    centroid = points.mean(axis=0)
+    mean_radius = float(np.linalg.norm(points - centroid, axis=1).mean())
+    centroid_offset = geo2D.euclidean_dist(centroid, bullseye)
+
+    return (float(centroid[0]), float(centroid[1])), mean_radius, float(centroid_offset)
+
+class Grouping:
+    def __init__(self):
+        '''
+        The grouping of the verified hits, recalculated only when the group changes.
+        '''
+
+        self.hits = []
+        self.anchor = None
+        self.contour = None
+        self.diameter = 0
+        self.centroid = None
+        self.mean_radius = 0
+        self.centroid_offset = 0
+
+    def update(self, hits):
+        '''
+        Update the grouping according to the current verified hits.
+        As long as the group consists of the same hits, its measurements stay the same,
+        and the polygon only follows the movement of the hits.
+
+        Parameters:
+            {List} hits - [
+                             {HitsManager.Hit} A verified hit
+                             ...
+                          ]
+        '''
+
+        same_hits = len(hits) == len(self.hits) and all(a is b for a, b in zip(hits, self.hits))
+
+        if not same_hits:
+            self.hits = list(hits)
+            self.contour = create_group_polygon(hits)
+
+            if type(self.contour) != type(None):
+                self.anchor = hits[0].point
+                self.diameter = measure_grouping_diameter(self.contour)
+                self.centroid, self.mean_radius, self.centroid_offset = measure_grouping_spread(hits)
+            else:
+                self.anchor = None
+                self.diameter = 0
+                self.centroid = None
+                self.mean_radius = 0
+                self.centroid_offset = 0
+
+        # follow the shifted hits (each hit's shift is rounded on its own,
+        # so the bull'seye point's movement is not necessarily theirs)
+        elif type(self.contour) != type(None):
+            shift_x = int(hits[0].point[0] - self.anchor[0])
+            shift_y = int(hits[0].point[1] - self.anchor[1])
+
+            if shift_x != 0 or shift_y != 0:
+                self.contour = self.contour + np.int32([shift_x, shift_y])
+                self.centroid = (self.centroid[0] + shift_x, self.centroid[1] + shift_y)
+                self.anchor = hits[0].point
+
+class GroupingStats:
+    def __init__(self, bins=20):
+        '''
+        Aggregate statistics of many groups of hits (e.g. the ends or the sessions of an archer),
+        accumulated group by group in constant memory.
+        Accumulators of separate workers can be merged into one.
+        The hits are given in the target's normalized coordinates (see ResultsStore.normalize_hits),
+        so groups of different videos can be aggregated together.
+
+        {Number} bins - Amount of cells in each row and column of the hits' histogram,
+                        which covers the square around the target's outer ring
+        '''
+
+        self.bins = bins
+        self.histogram = np.zeros((bins, bins), np.int64)
+        self.outside = 0
+
+        # sums of the hits' coordinates (and their squares), from which the center and the spread are derived
+        self.hits = 0
+        self.sum = np.zeros(2, np.float64)
+        self.sum_squares = np.zeros(2, np.float64)
+
+        # sums of the measurements of each group on its own
+        self.groups = 0
+        self.sum_extreme_spread = 0.
+        self.max_extreme_spread = 0.
+        self.sum_mean_radius = 0.
+
+    def add_group(self, points):
+        '''
+        Parameters:
+            {Numpy.array} points - The normalized points of a group's hits [(x, y), ...]
+        '''
+
+        points = np.float64(points).reshape(-1, 2)
+
+        if not len(points):
+            return
+
+        # count the hits in the histogram's cells
+        cells = np.floor((points + 1) * self.bins / 2).astype(np.int64)
+        inside = ((cells >= 0) & (cells < self.bins)).all(axis=1)
+        np.add.at(self.histogram, (cells[inside,1], cells[inside,0]), 1)
+        self.outside += int(np.count_nonzero(~inside))
+
+        self.hits += len(points)
+        self.sum += points.sum(axis=0)
+        self.sum_squares += (points ** 2).sum(axis=0)
+
+        # a single hit is not a group
+        if len(points) >= 2:
+            hull = cv2.convexHull(np.float32(points))
+            extreme_spread = measure_grouping_diameter(hull)
+            mean_radius = float(np.linalg.norm(points - points.mean(axis=0), axis=1).mean())
+
+            self.groups += 1
+            self.sum_extreme_spread += extreme_spread
+            self.max_extreme_spread = max(self.max_extreme_spread, extreme_spread)
+            self.sum_mean_radius += mean_radius
+
+    def merge(self, other):
+        '''
+        Add the statistics of another accumulator (e.g. of another worker).
+
+        Parameters:
+            {GroupingStats} other - An accumulator with the same amount of bins
+        '''
+
+        if other.bins != self.bins:
+            raise ValueError('Cannot merge histograms of ' + str(other.bins) + ' and ' + str(self.bins) + ' bins')
+
+        self.histogram += other.histogram
+        self.outside += other.outside
+        self.hits += other.hits
+        self.sum += other.sum
+        self.sum_squares += other.sum_squares
+        self.groups += other.groups
+        self.sum_extreme_spread += other.sum_extreme_spread
+        self.max_extreme_spread = max(self.max_extreme_spread, other.max_extreme_spread)
+        self.sum_mean_radius += other.sum_mean_radius
+
+    def get_summary(self):
+        '''
+        Returns:
+            {Dictionary} {
+                            'hits': {Number} Amount of accumulated hits,
+                            'groups': {Number} Amount of accumulated groups of at least two hits,
+                            'mean_point_of_impact': {Tuple} The center of all hits, or None if there are none,
+                            'radial_std': {Number} The standard deviation of the hits' distances
+                                          from their center,
+                            'mean_extreme_spread': {Number} The average diameter of a group,
+                            'max_extreme_spread': {Number} The largest diameter of a group,
+                            'mean_radius': {Number} The average distance of a group's hits from its center,
+                            'histogram': {Numpy.array} The amount of hits in each cell [rows, columns],
+                            'outside': {Number} Amount of hits outside of the histogram's square
+                         }
+                         All distances are relative to the outer ring's radius.
+        '''
+
+        if self.hits:
+            center = self.sum / self.hits
+            variance = (self.sum_squares / self.hits - center ** 2).sum()
+            mean_point = (float(center[0]), float(center[1]))
+            radial_std = float(np.sqrt(max(variance, 0)))
+        else:
+            mean_point = None
+            radial_std = 0.
+
+        return {
+            'hits': self.hits,
+            'groups': self.groups,
+            'mean_point_of_impact': mean_point,
+            'radial_std': radial_std,
+            'mean_extreme_spread': self.sum_extreme_spread / self.groups if self.groups else 0.,
+            'max_extreme_spread': self.max_extreme_spread,
+            'mean_radius': self.sum_mean_radius / self.groups if self.groups else 0.,
+            'histogram': self.histogram.copy(),
+            'outside': self.outside
+        }
\ No newline at end of file
@@ -1,12 +1,10 @@
 import Geometry2D as geo2D
 import numpy as np
+import heapq
 
 CANDIDATE = 0
 VERIFIED = 1
 
-candidate_hits = []
-verified_hits = []
-
 class Hit:
     def __init__(self, x, y, score, bullseyeRelation):
         '''
@@ -24,8 +22,95 @@ class Hit:
         self.reputation = 1
         self.bullseye_relation = bullseyeRelation
         
-        # has this hit been checked during current iteration
+        # has this hit been checked during current iteration,
+        # and amount of iterations since it was first detected
         self.iter_mark = False
+        self.age = 0
+
+        # running statistics of the hit's detections
+        # (the position is kept in the model's space, so it's not affected by the target's movement)
+        self.observations = 0
+        self.model_mean = (0., 0.)
+        self.model_m2 = (0., 0.)
+        self.boundary_distance = 0.
+        self.inlier_ratio = 0.
+
+    def observe(self, modelPoint, boundaryDistance, inlierRatio):
+        '''
+        Add a single detection to the hit's statistics.
+
+        Parameters:
+            {Tuple} modelPoint - The detected point in the model image
+            {Number} boundaryDistance - The distance of the point from the closest ring boundary [model px]
+            {Number} inlierRatio - The part of the feature matches that agreed
+                                   with the frame's homography [0-1]
+        '''
+
+        other = Hit(0, 0, 0, None)
+        other.observations = 1
+        other.model_mean = (float(modelPoint[0]), float(modelPoint[1]))
+        other.boundary_distance = float(boundaryDistance)
+        other.inlier_ratio = float(inlierRatio)
+        self.merge_observations(other)
+
+    def merge_observations(self, other):
+        '''
+        Add the detections of another hit (of the same point) to the hit's statistics.
+
+        Parameters:
+            {HitsManager.Hit} other - The hit whose detections are merged
+        '''
+
+        if not other.observations:
+            return
+
+        total = self.observations + other.observations
+
+        # merge the running means and the sums of squared differences (Chan et al.)
+        weight = other.observations / total
+        delta_x = other.model_mean[0] - self.model_mean[0]
+        delta_y = other.model_mean[1] - self.model_mean[1]
+        spread = self.observations * weight
+
+        self.model_mean = (self.model_mean[0] + delta_x * weight, self.model_mean[1] + delta_y * weight)
+        self.model_m2 = (self.model_m2[0] + other.model_m2[0] + delta_x ** 2 * spread,
+                         self.model_m2[1] + other.model_m2[1] + delta_y ** 2 * spread)
+
+        self.boundary_distance += (other.boundary_distance - self.boundary_distance) * weight
+        self.inlier_ratio += (other.inlier_ratio - self.inlier_ratio) * weight
+        self.observations = total
+
+    def get_quality(self):
+        '''
+        Returns:
+            {Dictionary} {
+                            'observations': {Number} Amount of detections of the hit,
+                            'position_std': {Number} The standard deviation of the detected positions [model px],
+                            'boundary_distance': {Number} The average distance of the detections
+                                                 from the closest ring boundary [model px],
+                            'inlier_ratio': {Number} The average part of the feature matches that agreed
+                                            with the homographies of the detections' frames [0-1],
+                            'score_confidence': {Number} The chance that the detections fall in the same ring
+                                                as the hit's point, assuming they are normally distributed [0-1]
+                         }
+        '''
+
+        variance = (self.model_m2[0] + self.model_m2[1]) / self.observations if self.observations else 0.
+        position_std = np.sqrt(variance)
+
+        # a boundary that's several deviations away is rarely crossed
+        if position_std > 0:
+            score_confidence = float(1 - np.exp(-self.boundary_distance ** 2 / (2 * position_std ** 2)))
+        else:
+            score_confidence = 1. if self.observations else 0.
+
+        return {
+            'observations': self.observations,
+            'position_std': float(position_std),
+            'boundary_distance': self.boundary_distance,
+            'inlier_ratio': self.inlier_ratio,
+            'score_confidence': score_confidence
+        }
     
     def increase_rep(self):
         '''
@@ -52,265 +137,447 @@ class Hit:
 
         return self.reputation >= repScore
 
-def create_scoreboard(hits, scale, ringsAmount, innerDiam):
+    def get_state(self):
+        '''
+        Returns:
+            {Dictionary} The hit's data, consisting only of lists, numbers and booleans.
+        '''
+
+        return {
+            'point': [int(self.point[0]), int(self.point[1])],
+            'score': int(self.score),
+            'reputation': int(self.reputation),
+            'bullseye_relation': [float(self.bullseye_relation[0]), float(self.bullseye_relation[1])],
+            'iter_mark': self.iter_mark,
+            'age': int(self.age),
+            'observations': int(self.observations),
+            'model_mean': [float(self.model_mean[0]), float(self.model_mean[1])],
+            'model_m2': [float(self.model_m2[0]), float(self.model_m2[1])],
+            'boundary_distance': float(self.boundary_distance),
+            'inlier_ratio': float(self.inlier_ratio)
+        }
+
+def hit_from_state(state):
     '''
-    Calculate the score of each detected hit.
+    Parameters:
+        {Dictionary} state - The product of Hit.get_state
+
+    Returns:
+        {HitsManager.Hit} A hit with the given data.
+    '''
+
+    x, y = state['point']
+    hit = Hit(x, y, state['score'], tuple(state['bullseye_relation']))
+    hit.reputation = state['reputation']
+    hit.iter_mark = state['iter_mark']
+    hit.age = state['age']
+    hit.observations = state['observations']
+    hit.model_mean = tuple(state['model_mean'])
+    hit.model_m2 = tuple(state['model_m2'])
+    hit.boundary_distance = state['boundary_distance']
+    hit.inlier_ratio = state['inlier_ratio']
+    return hit
+
+def create_scoreboard(hits, scores, modelPoints=None, boundaryDistances=None, inlierRatio=None):
+    '''
+    Create a hit for each detected suspect hit.
 
     Parameters:
         {list} hits - [
                             {tuple} (
                                     {Number} x coordinates of the hit,
                                     {Number} y coordinates of the hit,
-                                    {Number} The distance of the hit from the bull'seye
+                                    {Number} The distance of the hit from the bull'seye,
+                                    {Tuple} The bull'seye point
                                     )
                             ...
                        ]
-        {tuple} scale - (
-                            {Number} The percentage of the warped image's average horizontal edges' length
-                                    out of the model's average horizontal edges' length,
-                            {Number} The percentage of the warped image's average vertical edges' length
-                                    out of the model's average vertical edges' length,
-                            {Number} The size of the filmed target divided by the model target
-                        )
+        {list} scores - The score of each hit, according to the target's rings
+                        (see TargetModel.score_model_points)
+        {Numpy.array} modelPoints - The point of each hit in the model image,
+                                    or None to create the hits without statistics
+        {Numpy.array} boundaryDistances - The distance of each hit from the closest ring boundary
+                                          (see TargetModel.ring_boundary_distances)
+        {Number} inlierRatio - The part of the feature matches that agreed with the frame's homography [0-1]
     
     Returns:
         {list} [
-                    {tuple} (
-                                {tuple} (
-                                        {Number} x coordinates of the hit,
-                                        {Number} y coordinates of the hit
-                                        ),
-                                {Number} The hit's score according to the target's data
-                            )
+                    {HitsManager.Hit} A hit with its score
                     ...
                 ]
     '''
 
     scoreboard = []
     
-    for hit in hits:
-        hit_dist = hit[2]
-        scaled_diam = innerDiam * scale[2]
-        score = 10 - int(hit_dist / scaled_diam)
-
-        # clamp score between 10 and minimum available score
-        if score < 10 - ringsAmount + 1:
-            score = 0
-        elif score > 10:
-            score = 10
-        
-        hit_obj = Hit(int(hit[0]), int(hit[1]), score, hit[3])
+    for hit, score in zip(hits, scores):
+        hit_obj = Hit(int(hit[0]), int(hit[1]), int(score), hit[3])
         scoreboard.append(hit_obj)
 
+    if type(modelPoints) != type(None):
+        for hit_obj, point, boundary_dist in zip(scoreboard, modelPoints, boundaryDistances):
+            hit_obj.observe(point, boundary_dist, inlierRatio)
+
     return scoreboard
 
-def is_verified_hit(point, distanceTolerance):
-    '''
-    Parameters:
-        {Tuple} point - (
-                           {Number} x coordinate of the point,
-                           {Number} y coordinate of the point
-                        )
-        {Number} distanceTolerance - Amount of pixels around the point that can be ignored
-                                     in order to consider another point as the same one
+class HitsTracker:
+    def __init__(self, capacity=None, maxAge=None):
+        '''
+        Keep track of the candidate and verified hits of a single analysis session.
+        The amount of candidates is bounded, so that tracking them costs the same along long sessions.
+
+        {Number} capacity - Maximum amount of candidates (None for no limit).
+                            When it's exceeded, the candidates with the lowest reputation
+                            (the oldest of them) are evicted at the end of the iteration.
+        {Number} maxAge - Maximum amount of iterations in which a candidate can wait for verification
+                          before it's removed (None for no limit)
+        '''
 
-    Returns:
-        {Boolean} True if the point is of a verified hit.
-    '''
+        self.candidate_hits = []
+        self.verified_hits = []
+        self.capacity = capacity
+        self.max_age = maxAge
+
+        # amount of candidates created, and amount of verified hits
+        # that turned out to be duplicates of other verified hits
+        self.created_candidates = 0
+        self.redundant_hits = 0
+
+        # amount of candidates that were verified, or removed for each reason
+        self.promoted_candidates = 0
+        self.disqualified_candidates = 0
+        self.expired_candidates = 0
+        self.evicted_candidates = 0
+
+        # a grid of the verified hits, used to find duplicates,
+        # and the translation of the hits since the grid was built
+        self.verified_grid = {}
+        self.grid_size = None
+        self.grid_shift = (0, 0)
+
+    def is_verified_hit(self, point, distanceTolerance):
+        '''
+        Parameters:
+            {Tuple} point - (
+                               {Number} x coordinate of the point,
+                               {Number} y coordinate of the point
+                            )
+            {Number} distanceTolerance - Amount of pixels around the point that can be ignored
+                                         in order to consider another point as the same one
 
-    return type(get_hit(VERIFIED, point, distanceTolerance)) != type(None)
+        Returns:
+            {Boolean} True if the point is of a verified hit.
+        '''
 
-def is_candidate_hit(point, distanceTolerance):
-    '''
-    Parameters:
-        {Tuple} point - (
-                           {Number} x coordinate of the point,
-                           {Number} y coordinate of the point
-                        )
-        {Number} distanceTolerance - Amount of pixels around the point that can be ignored
-                                     in order to consider another point as the same one
+        return type(self.get_hit(VERIFIED, point, distanceTolerance)) != type(None)
 
-    Returns:
-        {Boolean} True if the point is of a known hit that's yet to be verified.
-    '''
+    def is_candidate_hit(self, point, distanceTolerance):
+        '''
+        Parameters:
+            {Tuple} point - (
+                               {Number} x coordinate of the point,
+                               {Number} y coordinate of the point
+                            )
+            {Number} distanceTolerance - Amount of pixels around the point that can be ignored
+                                         in order to consider another point as the same one
+
+        Returns:
+            {Boolean} True if the point is of a known hit that's yet to be verified.
+        '''
     
-    return type(get_hit(CANDIDATE, point, distanceTolerance)) != type(None)
+        return type(self.get_hit(CANDIDATE, point, distanceTolerance)) != type(None)
 
-def get_hit(group, point, distanceTolerance):
-    '''
-    Parameters:
-        {Number} group - The group to which the hit belongs
-                            [HitsManager constant (VERIFIED, CANDIDATE)]
-        {Tuple} point - (
-                        {Number} x coordinate of the point,
-                        {Number} y coordinate of the point
-                        )
-        {Number} distanceTolerance - Amount of pixels around the point that can be ignored
-                                     in order to consider another point as the same one
+    def get_hit(self, group, point, distanceTolerance):
+        '''
+        Parameters:
+            {Number} group - The group to which the hit belongs
+                                [HitsManager constant (VERIFIED, CANDIDATE)]
+            {Tuple} point - (
+                            {Number} x coordinate of the point,
+                            {Number} y coordinate of the point
+                            )
+            {Number} distanceTolerance - Amount of pixels around the point that can be ignored
+                                         in order to consider another point as the same one
 
-    Returns:
-        {HitsManager.Hit} The hit that's closest to the given point,
-                            considering the tolarance distance around it.
-                            If no hit is found, this function returns None.
-    '''
+        Returns:
+            {HitsManager.Hit} The hit that's closest to the given point,
+                                considering the tolarance distance around it.
+                                If no hit is found, this function returns None.
+        '''
 
-    hits_list = get_hits(group)
-    compatible_hits = []
+        hits_list = self.get_hits(group)
+        compatible_hits = []
 
-    for hit in hits_list:
-        if geo2D.euclidean_dist(point, hit.point) <= distanceTolerance:
-            compatible_hits.append(hit)
+        for hit in hits_list:
+            if geo2D.euclidean_dist(point, hit.point) <= distanceTolerance:
+                compatible_hits.append(hit)
             
-    if len(compatible_hits) > 0:
-        return compatible_hits[0]
-    else:
-        return None
+        if len(compatible_hits) > 0:
+            return compatible_hits[0]
+        else:
+            return None
 
-def eliminate_verified_redundancy(distanceTolerance):
-    '''
-    Find duplicate verified hits and eliminate them.
+    def _grid_cell(self, point):
+        '''
+        Parameters:
+            {Tuple} point - (
+                               {Number} x coordinate of the point,
+                               {Number} y coordinate of the point
+                            )
 
-    Parameters:
-        {Number} distanceTolerance - Amount of pixels around a point that can be ignored
-                                     in order to consider another point as the same one
-    '''
+        Returns:
+            {Tuple} The cell of the verified hits' grid in which the point falls.
+        '''
 
-    if len(verified_hits) <= 1:
-        return
-    
-    # create a table of the distances between all hits
-    table = np.ndarray((len(verified_hits),len(verified_hits)), np.float32)
-    j_leap = 0
-    for i in range(len(table)):
-        for j in range(len(table[i])):
-            col = j + j_leap
-            if col >= len(table[i]):
-                continue
-            
-            hit_i = verified_hits[i].point
-            hit_j = verified_hits[col].point
-            dist = geo2D.euclidean_dist(hit_i, hit_j)
-            table[i][col] = dist
-            
-        j_leap += 1
-    
-    # find distances that are smaller than the threshold and eliminate the redundant hits
-    j_leap = 0
-    for i in range(len(table)):
-        for j in range(len(table[i])):
-            col = j + j_leap
-            if col >= len(verified_hits):
-                continue
-            
-            if i == col or i >= len(verified_hits):
-                continue
-            
-            if table[i][col] < distanceTolerance:
-                hit_i = verified_hits[i].point
-                hit_j = verified_hits[col].point
-                
-                # check the distance from the bull'seye point
-                bullseye_i = verified_hits[i].bullseye_relation
-                bullseye_j = verified_hits[col].bullseye_relation
-                bullseye_dist_i = geo2D.euclidean_dist(hit_i, bullseye_i)
-                bullseye_dist_j = geo2D.euclidean_dist(hit_j, bullseye_j)
-
-                if bullseye_dist_i < bullseye_dist_j:
-                    verified_hits.remove(verified_hits[col])
-                else:
-                    verified_hits.remove(verified_hits[i])
-        
-        j_leap += 1
+        return (int((point[0] - self.grid_shift[0]) // self.grid_size),
+                int((point[1] - self.grid_shift[1]) // self.grid_size))
 
-def sort_hit(hit, distanceTolerance, minVerifiedReputation):
-    '''
-    Sort a hit and place it in either of the lists.
-    Increase the reputation of a hit that's already a candidate,
-    or add a hit as a candidate if it's not already known.
+    def _index_verified_hits(self, distanceTolerance):
+        '''
+        Place all verified hits in a grid of cells, as large as the distance tolerance,
+        so that the hits that are close to a point are all found in the 9 cells around it.
 
-    Parameters:
-        {HitsManager.Hit} hit - The hit to sort
-        {Number} distanceTolerance - Amount of pixels around a point that can be ignored
-                                     in order to consider another point as the same one
-        {Number} minVerifiedReputation - The minimum reputation needed to verify a hit
-    '''
+        Parameters:
+            {Number} distanceTolerance - Amount of pixels around a point that can be ignored
+                                         in order to consider another point as the same one
+        '''
 
-    candidate = get_hit(CANDIDATE, hit.point, distanceTolerance)
+        self.grid_size = distanceTolerance
+        self.grid_shift = (0, 0)
+        self.verified_grid = {}
 
-    # the hit is a known candidate
-    if type(candidate) != type(None):
-        candidate.increase_rep()
-        candidate.iter_mark = True
+        for hit in self.verified_hits:
+            self.verified_grid.setdefault(self._grid_cell(hit.point), []).append(hit)
 
-        # candidate is now eligable for verification
-        if candidate.isVerified(minVerifiedReputation):
-            verified_hits.append(candidate)
-            candidate_hits.remove(candidate)
-            
-            # find duplicate verified hits and eliminate them
-            eliminate_verified_redundancy(distanceTolerance)
+    def eliminate_verified_redundancy(self, hit, distanceTolerance):
+        '''
+        Verify a hit, unless it's a duplicate of another verified hit.
+        Of two duplicate hits, the one that's closer to the bull'seye point is kept.
+        Only the hits around the newly verified hit are checked.
 
-    # new candidate
-    else:
-        candidate_hits.append(hit)
-        hit.iter_mark = True
+        Parameters:
+            {HitsManager.Hit} hit - The newly verified hit
+            {Number} distanceTolerance - Amount of pixels around a point that can be ignored
+                                         in order to consider another point as the same one
 
-def discharge_hits():
-    '''
-    Lower the reputation of hits that were not detected during the last iteration.
-    Hits with reputation under 1 are disqualified and removed.
-    '''
+        Returns:
+            {Boolean} True if the hit is verified, or False if it's a duplicate.
+        '''
+
+        if self.grid_size != distanceTolerance:
+            self._index_verified_hits(distanceTolerance)
+
+        cell_x, cell_y = self._grid_cell(hit.point)
+        duplicates = []
+
+        for x in range(cell_x - 1, cell_x + 2):
+            for y in range(cell_y - 1, cell_y + 2):
+                for other in self.verified_grid.get((x, y), []):
+                    if geo2D.euclidean_dist(hit.point, other.point) < distanceTolerance:
+                        duplicates.append(other)
+
+        # check the distance from the bull'seye point
+        bullseye_dist = geo2D.euclidean_dist(hit.point, hit.bullseye_relation)
+
+        for other in duplicates:
+            if geo2D.euclidean_dist(other.point, other.bullseye_relation) <= bullseye_dist:
+                other.merge_observations(hit)
+                self.redundant_hits += 1
+                return False
+
+        # the new hit is closer to the bull'seye point than all of its duplicates
+        for other in duplicates:
+            hit.merge_observations(other)
+            self.verified_hits.remove(other)
+            self.verified_grid[self._grid_cell(other.point)].remove(other)
+            self.redundant_hits += 1
+
+        self.verified_hits.append(hit)
+        self.verified_grid.setdefault((cell_x, cell_y), []).append(hit)
+        return True
+
+    def sort_hit(self, hit, distanceTolerance, minVerifiedReputation):
+        '''
+        Sort a hit and place it in either of the lists.
+        Increase the reputation of a hit that's already a candidate,
+        or add a hit as a candidate if it's not already known.
+
+        Parameters:
+            {HitsManager.Hit} hit - The hit to sort
+            {Number} distanceTolerance - Amount of pixels around a point that can be ignored
+                                         in order to consider another point as the same one
+            {Number} minVerifiedReputation - The minimum reputation needed to verify a hit
+        '''
+
+        candidate = self.get_hit(CANDIDATE, hit.point, distanceTolerance)
+
+        # the hit is a known candidate
+        if type(candidate) != type(None):
+            candidate.increase_rep()
+            candidate.merge_observations(hit)
+            candidate.iter_mark = True
+
+            # candidate is now eligable for verification,
+            # unless it's a duplicate of another verified hit
+            if candidate.isVerified(minVerifiedReputation):
+                self.candidate_hits.remove(candidate)
+                self.promoted_candidates += 1
+                self.eliminate_verified_redundancy(candidate, distanceTolerance)
+
+        # new candidate
+        else:
+            self.candidate_hits.append(hit)
+            self.created_candidates += 1
+            hit.iter_mark = True
+
+    def discharge_hits(self):
+        '''
+        Lower the reputation of hits that were not detected during the last iteration.
+        Hits with reputation under 1 are disqualified and removed,
+        and so are hits that have been waiting for verification for too long.
+        If there are still more candidates than the capacity, the weakest of them are evicted.
+        '''
+
+        remaining = []
+
+        for candidate in self.candidate_hits:
+            candidate.age += 1
 
-    for candidate in candidate_hits:
-        # candidate is not present during the current iteration
-        if not candidate.iter_mark:
-            candidate.decrease_rep()
+            # candidate is not present during the current iteration
+            if not candidate.iter_mark:
+                candidate.decrease_rep()
             
-            # candidate disqualified
-            if candidate.reputation <= 0:
-                candidate_hits.remove(candidate)
+                # candidate disqualified
+                if candidate.reputation <= 0:
+                    self.disqualified_candidates += 1
+                    continue
+
+            # candidate never gained enough reputation
+            if self.max_age != None and candidate.age > self.max_age:
+                self.expired_candidates += 1
                 continue
         
-        # get ready for the next iteration
-        candidate.iter_mark = False
+            # get ready for the next iteration
+            candidate.iter_mark = False
+            remaining.append(candidate)
 
-def shift_hits(bullseye):
-    '''
-    Shift all hits according to the new position of the bull'seye point in the target.
+        # evict all of the excess candidates at once, keeping the order of the others
+        excess = len(remaining) - self.capacity if self.capacity != None else 0
 
-    Parameters:
-        {Tuple} bullseye - (
-                              {Number} current x coordinate of the bull'seye point in the target,
-                              {Number} current y coordinate of the bull'seye point in the target
-                           )
-    '''
+        if excess > 0:
+            weakest = set(heapq.nsmallest(excess, range(len(remaining)),
+                                          key=lambda i: (remaining[i].reputation, -remaining[i].age)))
+
+            remaining = [c for i, c in enumerate(remaining) if i not in weakest]
+            self.evicted_candidates += excess
+
+        self.candidate_hits = remaining
+
+    def shift_hits(self, bullseye):
+        '''
+        Shift all hits according to the new position of the bull'seye point in the target.
 
-    all_hits = candidate_hits + verified_hits
+        Parameters:
+            {Tuple} bullseye - (
+                                  {Number} current x coordinate of the bull'seye point in the target,
+                                  {Number} current y coordinate of the bull'seye point in the target
+                               )
+        '''
+
+        all_hits = self.candidate_hits + self.verified_hits
+        verified_shifts = set()
     
-    for h in all_hits:
-        # find the correct translation amount
-        x_dist = bullseye[0] - h.bullseye_relation[0]
-        y_dist = bullseye[1] - h.bullseye_relation[1]
-        new_x = int(round(h.point[0] + x_dist))
-        new_y = int(round(h.point[1] + y_dist))
+        for i, h in enumerate(all_hits):
+            # find the correct translation amount
+            x_dist = bullseye[0] - h.bullseye_relation[0]
+            y_dist = bullseye[1] - h.bullseye_relation[1]
+            new_x = int(round(h.point[0] + x_dist))
+            new_y = int(round(h.point[1] + y_dist))
         
-        # translate and update relation attribute
-        h.bullseye_relation = bullseye
-        h.point = (new_x,new_y)
+            if i >= len(self.candidate_hits):
+                verified_shifts.add((new_x - h.point[0], new_y - h.point[1]))
 
-def get_hits(group):
-    '''
-    Parameters:
-        {Number} group - The group to which the hit belongs
-                         [HitsManager constant (VERIFIED, CANDIDATE)]
+            # translate and update relation attribute
+            h.bullseye_relation = bullseye
+            h.point = (new_x,new_y)
 
-    Returns:
-        {List} The requested group of hits.
-    '''
+        # the grid follows the verified hits as long as they all move together
+        if len(verified_shifts) == 1:
+            shift_x, shift_y = verified_shifts.pop()
+            self.grid_shift = (self.grid_shift[0] + shift_x, self.grid_shift[1] + shift_y)
+        elif len(verified_shifts) > 1:
+            self.grid_size = None
+
+    def get_hits(self, group):
+        '''
+        Parameters:
+            {Number} group - The group to which the hit belongs
+                             [HitsManager constant (VERIFIED, CANDIDATE)]
+
+        Returns:
+            {List} The requested group of hits.
+        '''
+
+        switcher = {
+            0: self.candidate_hits,
+            1: self.verified_hits
+        }
+
+        return switcher.get(group, [])
+
+    def get_state(self):
+        '''
+        Returns:
+            {Dictionary} All tracked hits and counters, consisting only of lists, numbers and booleans.
+        '''
 
-    switcher = {
-        0: candidate_hits,
-        1: verified_hits
-    }
+        return {
+            'candidates': [h.get_state() for h in self.candidate_hits],
+            'verified': [h.get_state() for h in self.verified_hits],
+            'metrics': self.get_metrics()
+        }
+
+    def get_metrics(self):
+        '''
+        Returns:
+            {Dictionary} {
+                            'candidates': {Number} Current amount of candidates,
+                            'verified': {Number} Current amount of verified hits,
+                            'created_candidates': {Number} Amount of candidates created,
+                            'promoted_candidates': {Number} Amount of candidates that were verified,
+                            'redundant_hits': {Number} Amount of verified hits that turned out to be duplicates,
+                            'disqualified_candidates': {Number} Amount of candidates that lost their reputation,
+                            'expired_candidates': {Number} Amount of candidates that were never verified in time,
+                            'evicted_candidates': {Number} Amount of candidates that were evicted
+                                                  to make room for new ones
+                         }
+        '''
+
+        return {
+            'candidates': len(self.candidate_hits),
+            'verified': len(self.verified_hits),
+            'created_candidates': self.created_candidates,
+            'promoted_candidates': self.promoted_candidates,
+            'redundant_hits': self.redundant_hits,
+            'disqualified_candidates': self.disqualified_candidates,
+            'expired_candidates': self.expired_candidates,
+            'evicted_candidates': self.evicted_candidates
+        }
+
+    def set_state(self, state):
+        '''
+        Replace all tracked hits and counters.
+
+        Parameters:
+            {Dictionary} state - The product of get_state
+        '''
 
-    return switcher.get(group, [])
\ No newline at end of file
+        self.candidate_hits = [hit_from_state(h) for h in state['candidates']]
+        self.verified_hits = [hit_from_state(h) for h in state['verified']]
+        self.grid_size = None
+        metrics = state['metrics']
+        self.created_candidates = metrics['created_candidates']
+        self.redundant_hits = metrics['redundant_hits']
+        self.promoted_candidates = metrics['promoted_candidates']
+        self.disqualified_candidates = metrics['disqualified_candidates']
+        self.expired_candidates = metrics['expired_candidates']
+        self.evicted_candidates = metrics['evicted_candidates']
\ No newline at end of file
@@ -22,23 +22,124 @@ def ratio_match(matcher, queryDesc, train, ratio):
     '''
 
     train_keys, train_desc = matcher.detectAndCompute(train, None)
+    best_match = ratio_match_features(queryDesc, train_desc, ratio)
+
+    if best_match == None:
+        return [], ([], [])
+
+    return best_match, (train_keys, train_desc)
+
+def ratio_match_features(queryDesc, trainDesc, ratio):
+    '''
+    Find feature matches between two already computed descriptions.
+
+    Parameters:
+        {list} queryDesc - The computed description of the query image
+        {list} trainDesc - The computed description of the train image
+        {Number} ratio - The percentage above which all matches are ignored [0-1]
+
+    Returns:
+        {list} A list of the best found matches (under the ratio condition),
+               or None if the matches could not be tested.
+    '''
+
     bf = cv2.BFMatcher(crossCheck=False)
     best_match = []
     
-    if type(train_desc) != type(None):
+    if type(trainDesc) != type(None):
         # apply ratio test
-        matches = bf.knnMatch(queryDesc, train_desc, k=2)
+        matches = bf.knnMatch(queryDesc, trainDesc, k=2)
 
         try:
             for m1, m2 in matches:
                 if m1.distance < ratio * m2.distance:
                     best_match.append(m1)
         except ValueError:
-            return [], ([], [])
+            return None
 
-    return best_match, (train_keys, train_desc)
+    return best_match
+
+# the robust estimators supported by this build of OpenCV
+ESTIMATORS = { 'ransac': cv2.RANSAC }
+
+for name in ['USAC_DEFAULT', 'USAC_FAST', 'USAC_ACCURATE', 'USAC_PROSAC', 'USAC_MAGSAC']:
+    if hasattr(cv2, name):
+        ESTIMATORS[name.lower()] = getattr(cv2, name)
+
+def match_points(queryKeys, trainKeys, matches):
+    '''
+    Parameters:
+        {list} queryKeys - The keypoints of the query image
+        {list} trainKeys - The keypoints of the train image
+        {list} matches - The detected matches between the query and the train images
+
+    Returns:
+        {Tuple} (
+                   {Numpy.array} The matched points of the query image,
+                   {Numpy.array} The matched points of the train image
+                )
+    '''
+
+    src_pts = np.float32([queryKeys[m.queryIdx].pt for m in matches]).reshape(-1, 1, 2)
+    dst_pts = np.float32([trainKeys[m.trainIdx].pt for m in matches]).reshape(-1, 1, 2)
+    return src_pts, dst_pts
 
-def calc_homography(queryKeys, trainKeys, matches):
+def find_inliers(srcPts, dstPts, homography, threshold):
+    '''
+    Parameters:
+        {Numpy.array} srcPts - The matched points of the query image
+        {Numpy.array} dstPts - The matched points of the train image
+        {Numpy.array} homography - The homography of the query image over the train image
+        {Number} threshold - The maximum reprojection error of an inlier [px]
+
+    Returns:
+        {Numpy.array} A mask of the matches that agree with the homography (inliers).
+    '''
+
+    projected = cv2.perspectiveTransform(srcPts, homography)
+    errors = np.linalg.norm((projected - dstPts).reshape(-1, 2), axis=1)
+    return (errors < threshold).astype(np.uint8).reshape(-1, 1)
+
+def verify_homography(srcPts, dstPts, homography, threshold, minInlierRatio):
+    '''
+    Check if a known homography (e.g. of the previous frame) still explains the matches,
+    and refine it over its inliers, instead of estimating a new one from random samples.
+
+    Parameters:
+        {Numpy.array} srcPts - The matched points of the query image
+        {Numpy.array} dstPts - The matched points of the train image
+        {Numpy.array} homography - The known homography of the query image over the train image
+        {Number} threshold - The maximum reprojection error of an inlier [px]
+        {Number} minInlierRatio - The minimum part of the matches that must agree with the homography [0-1]
+
+    Returns:
+        {Tuple} (
+                   {Numpy.array} The refined homography, or None if the known one does not fit anymore,
+                   {Numpy.array} A mask of the inliers, or None if the known homography does not fit anymore
+                )
+    '''
+
+    min_inliers = max(4, minInlierRatio * len(srcPts))
+    inliers = find_inliers(srcPts, dstPts, homography, threshold)
+
+    if np.count_nonzero(inliers) < min_inliers:
+        return None, None
+
+    # a least squares fit over the inliers is enough, since they are already known
+    inlier_rows = inliers.ravel() == 1
+    H, _ = cv2.findHomography(srcPts[inlier_rows], dstPts[inlier_rows], 0)
+
+    if type(H) == type(None):
+        return None, None
+
+    inliers = find_inliers(srcPts, dstPts, H, threshold)
+
+    if np.count_nonzero(inliers) < min_inliers:
+        return None, None
+
+    return H, inliers
+
+def calc_homography(queryKeys, trainKeys, matches, threshold=5, method='ransac', seed=None, minSeedRatio=.6):
     '''
     Calculate the homography of a query image over a train image.
 
@@ -46,20 +147,38 @@ def calc_homography(queryKeys, trainKeys, matches):
         {list} queryKeys - The keypoints of the query image
         {list} trainKeys - The keypoints of the train image
         {list} matches - The detected matches between the query and the train images
+        {Number} threshold - The maximum reprojection error of an inlier [px]
+        {String} method - The name of the robust estimator (see ESTIMATORS).
+                          Estimators that this build of OpenCV does not support fall back to RANSAC.
+        {Numpy.array} seed - A homography that's likely to fit (e.g. the previous frame's),
+                             which is verified before estimating a new one, or None to always estimate
+        {Number} minSeedRatio - The minimum part of the matches that must agree with the seed
+                                in order to refine it instead of estimating a new homography [0-1]
 
     Returns:
-        {Numpy.array} A 3x3 array representing the query image's homography, or None if no matches exist.
+        {Tuple} (
+                   {Numpy.array} A 3x3 array representing the query image's homography,
+                                 or None if no matches exist,
+                   {Numpy.array} A mask of the matches that agree with the homography (inliers),
+                                 or None if no matches exist
+                )
     '''
 
     if not len(matches):
-        return None
+        return None, None
 
     # reshape keypoints
-    src_pts = np.float32([queryKeys[m.queryIdx].pt for m in matches]).reshape(-1, 1, 2)
-    dst_pts = np.float32([trainKeys[m.trainIdx].pt for m in matches]).reshape(-1, 1, 2)
-    
-    H, _ = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 5)
-    return H
+    src_pts, dst_pts = match_points(queryKeys, trainKeys, matches)
+
+    # the target moves only a little between frames, so the last homography usually still fits
+    if type(seed) != type(None):
+        H, mask = verify_homography(src_pts, dst_pts, seed, threshold, minSeedRatio)
+
+        if type(H) != type(None):
+            return H, mask
+
+    H, mask = cv2.findHomography(src_pts, dst_pts, ESTIMATORS.get(method, cv2.RANSAC), threshold)
+    return H, mask
 
 def is_true_homography(vertices, edges, imgSize, stretchThreshold):
     '''
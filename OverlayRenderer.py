@@ -0,0 +1,203 @@
+from concurrent.futures import ProcessPoolExecutor
+import HitsManager as hitsMngr
+import FrameCache
+import Checkpoint
+import numpy as np
+import json
+import cv2
+import os
+
+class ResultsRecorder:
+    def __init__(self, path, append=False):
+        '''
+        Store the drawn results of each analyzed frame in a file (a JSON object per line),
+        so that the output video can be rendered again without analyzing the video.
+
+        {String} path - The path of the results file
+        {Boolean} append - True to continue an existing file (e.g. when resuming from a checkpoint)
+        '''
+
+        # verified hits keep the same id in all frames (and are kept alive, so their ids are never reused)
+        self.hit_ids = {}
+        self.verified_hits = []
+        self.first_id = 0
+
+        # continue the ids of a previous session
+        if append and os.path.exists(path):
+            for frame_result in load_results(path).values():
+                for h in frame_result['verified']:
+                    self.first_id = max(self.first_id, h['id'] + 1)
+
+        self.file = open(path, 'a' if append else 'w')
+
+    def _hit_id(self, hit):
+        '''
+        Returns:
+            {Number} The hit's id in the results file.
+        '''
+
+        if id(hit) not in self.hit_ids:
+            self.hit_ids[id(hit)] = self.first_id + len(self.hit_ids)
+            self.verified_hits.append(hit)
+
+        return self.hit_ids[id(hit)]
+
+    def record(self, frameIndex, bullseye, candidateHits, verifiedHits, groupingContour, groupingDiameter):
+        '''
+        Parameters:
+            {Number} frameIndex - The index of the frame in the video
+            {Tuple} bullseye - The bull'seye point in the frame, or None if the target is not found
+            {List} candidateHits - The hits that are yet to be verified
+            {List} verifiedHits - The verified hits
+            {Numpy.array} groupingContour - The external contour of the group, or None if there's no group
+            {Number} groupingDiameter - The diameter of the grouping [px]
+        '''
+
+        def hit_to_dict(hit):
+            return { 'x': int(hit.point[0]), 'y': int(hit.point[1]), 'score': int(hit.score) }
+
+        frame_result = {
+            'frame': frameIndex,
+            'bullseye': [float(bullseye[0]), float(bullseye[1])] if type(bullseye) != type(None) else None,
+            'candidates': [hit_to_dict(h) for h in candidateHits],
+            'verified': [dict(hit_to_dict(h), id=self._hit_id(h)) for h in verifiedHits],
+            'grouping_contour': groupingContour.reshape(-1, 2).tolist() if type(groupingContour) != type(None) else None,
+            'grouping_diameter': float(groupingDiameter)
+        }
+
+        self.file.write(json.dumps(frame_result, separators=(',', ':')) + '\n')
+
+    def close(self):
+        self.file.close()
+
+def load_results(path):
+    '''
+    Parameters:
+        {String} path - The path of a results file
+
+    Returns:
+        {Dictionary} {
+                        {Number} frame index: {Dictionary} The frame's results (see ResultsRecorder.record)
+                        ...
+                     }
+                     A frame that's recorded more than once (after resuming) keeps its last results.
+    '''
+
+    results = {}
+
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                frame_result = json.loads(line)
+                results[frame_result['frame']] = frame_result
+
+    return results
+
+def _render_range(job):
+    '''
+    Render the overlay of a range of frames in a separate process.
+
+    Parameters:
+        {Tuple} job - (
+                         {String} The path of the source video (or of a raw frame store),
+                         {Dictionary} The results of the frames in the range (see load_results),
+                         {String} The path of the output file,
+                         {Sketcher} The sketcher to draw with,
+                         {Number} The index of the first frame of the range,
+                         {Number} The index of the frame after the range's last frame
+                      )
+
+    Returns:
+        {Number} Amount of rendered frames.
+    '''
+
+    video_path, results, output_path, sketcher, start, end = job
+
+    # the ranges already run in parallel
+    cv2.setNumThreads(1)
+
+    cap = FrameCache.open_capture(video_path)
+    frame_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), 24.0, frame_size)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    verified_hits = {}
+    rendered = 0
+
+    for frame_index in range(start, end):
+        # frames that were fast-forwarded during the analysis are left out of the output
+        if frame_index not in results:
+            if not cap.grab():
+                break
+
+            continue
+
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        frame_result = results[frame_index]
+        candidate_hits = [hitsMngr.Hit(h['x'], h['y'], h['score'], None) for h in frame_result['candidates']]
+        frame_verified = []
+
+        # the same hit object is kept for each verified hit, so its marks are drawn only once
+        for h in frame_result['verified']:
+            hit = verified_hits.setdefault(h['id'], hitsMngr.Hit(h['x'], h['y'], h['score'], None))
+            hit.point = (h['x'], h['y'])
+            hit.score = h['score']
+            frame_verified.append(hit)
+
+        contour = frame_result['grouping_contour']
+        contour = np.int32(contour).reshape(-1, 1, 2) if contour != None else None
+        sketcher.draw_analysis(frame, candidate_hits, frame_verified, contour, frame_result['grouping_diameter'])
+        out.write(frame)
+        rendered += 1
+
+    cap.release()
+    out.release()
+    return rendered
+
+def render(videoPath, resultsPath, outputName, sketcher, workers=None):
+    '''
+    Render the overlay video from stored results, without analyzing the video again.
+    Rendering depends only on each frame's results, so the video is split into frame ranges
+    that are rendered in parallel, each into its own segment ('output_000.mp4', 'output_001.mp4', ...).
+
+    Parameters:
+        {String} videoPath - The path of the source video (or of a raw frame store)
+        {String} resultsPath - The path of the results file that was recorded during the analysis
+        {String} outputName - The path of the output file (split into segments when rendering in parallel)
+        {Sketcher} sketcher - The sketcher to draw with (e.g. with another measure unit)
+        {Number} workers - Amount of processes to use (defaults to the amount of CPU cores)
+
+    Returns:
+        {List} The paths of the rendered files, in order.
+    '''
+
+    results = load_results(resultsPath)
+
+    if not len(results):
+        return []
+
+    workers = workers or os.cpu_count()
+    first_frame = min(results)
+    last_frame = max(results) + 1
+    range_size = max(1, -(-(last_frame - first_frame) // workers))
+    jobs = []
+
+    for start in range(first_frame, last_frame, range_size):
+        end = min(start + range_size, last_frame)
+        range_results = { i: results[i] for i in range(start, end) if i in results }
+        jobs.append((videoPath, range_results, None, sketcher, start, end))
+
+    # a single range is rendered straight into the output file
+    if len(jobs) == 1:
+        output_paths = [outputName]
+    else:
+        output_paths = [Checkpoint.segment_path(outputName, i) for i in range(len(jobs))]
+
+    jobs = [job[:2] + (path,) + job[3:] for job, path in zip(jobs, output_paths)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(_render_range, jobs))
+
+    return output_paths
\ No newline at end of file
@@ -0,0 +1,249 @@
+from concurrent.futures import ProcessPoolExecutor
+from AnalysisConfig import AnalysisConfig
+from VideoAnalyzer import VideoAnalyzer
+from TargetModel import TargetModel
+import Geometry2D as geo2D
+import FrameCache
+import itertools
+import time
+import sys
+import cv2
+import os
+
+def _evaluate_config(job):
+    '''
+    Analyze a clip with a single configuration in a separate process.
+
+    Parameters:
+        {Tuple} job - (
+                         {String} The path of the clip (a video or a raw frame store),
+                         {Tuple} The arguments of the TargetModel,
+                         {Dictionary} The values of the AnalysisConfig,
+                         {Number} Maximum amount of frames to analyze (None for the whole clip),
+                         {String} The directory of a shared stage cache, or None to disable it
+                      )
+
+    Returns:
+        {Dictionary} {
+                        'hits': {List} [
+                                          {Tuple} (
+                                                     {Number} x coordinate of the hit relative to the bull'seye point,
+                                                     {Number} y coordinate of the hit relative to the bull'seye point,
+                                                     {Number} The hit's score
+                                                  )
+                                          ...
+                                       ],
+                        'frames': {Number} Amount of analyzed frames,
+                        'seconds': {Number} The analysis time
+                     }
+    '''
+
+    clip_path, target_args, config_values, frames, stage_cache_dir = job
+
+    # the configurations already run in parallel
+    cv2.setNumThreads(1)
+
+    analyzer = VideoAnalyzer(clip_path, TargetModel(*target_args), AnalysisConfig(**config_values))
+    analyzer.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    if stage_cache_dir != None:
+        analyzer.stage_cache = FrameCache.StageCache(stage_cache_dir, clip_path, analyzer.target)
+
+    frames_amount = 0
+    verified_hits = []
+    start = time.time()
+
+    while frames == None or frames_amount < frames:
+        frame_index = int(analyzer.cap.get(cv2.CAP_PROP_POS_FRAMES))
+        ret, frame = analyzer.cap.read()
+        if not ret:
+            break
+
+        verified_hits = analyzer.process_frame(frame, frame_index)['verified']
+        frames_amount += 1
+
+    seconds = time.time() - start
+    analyzer.cap.release()
+
+    hits = [(float(h.point[0] - h.bullseye_relation[0]), float(h.point[1] - h.bullseye_relation[1]), int(h.score))
+            for h in verified_hits]
+
+    return { 'hits': hits, 'frames': frames_amount, 'seconds': seconds }
+
+def measure_accuracy(hits, expectedHits, distanceTolerance):
+    '''
+    Compare the detected hits with the expected ones.
+    Each expected hit is matched with the closest detected hit within the distance tolerance,
+    and each detected hit can match a single expected hit.
+
+    Parameters:
+        {List} hits - [
+                         {Tuple} (
+                                    {Number} x coordinate of the hit relative to the bull'seye point,
+                                    {Number} y coordinate of the hit relative to the bull'seye point,
+                                    {Number} The hit's score
+                                 )
+                         ...
+                      ]
+        {List} expectedHits - The hits that should have been detected, in the same format
+        {Number} distanceTolerance - The maximum distance [px] between a detected hit and an expected one
+
+    Returns:
+        {Dictionary} {
+                        'precision': {Number} The part of the detected hits that are expected [0-1],
+                        'recall': {Number} The part of the expected hits that are detected [0-1],
+                        'f1': {Number} The harmonic mean of the precision and the recall [0-1],
+                        'position_error': {Number} The average distance of the matched hits [px],
+                        'score_error': {Number} The difference between the total scores
+                     }
+    '''
+
+    unmatched = list(hits)
+    distances = []
+
+    for expected in expectedHits:
+        candidates = [(geo2D.euclidean_dist(h[:2], expected[:2]), i) for i, h in enumerate(unmatched)]
+        candidates = [c for c in candidates if c[0] <= distanceTolerance]
+
+        if len(candidates):
+            distance, index = min(candidates)
+            distances.append(distance)
+            del unmatched[index]
+
+    matched = len(distances)
+    precision = matched / len(hits) if len(hits) else float(len(expectedHits) == 0)
+    recall = matched / len(expectedHits) if len(expectedHits) else 1.
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.
+
+    return {
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'position_error': sum(distances) / matched if matched else float('inf'),
+        'score_error': abs(sum(h[2] for h in hits) - sum(h[2] for h in expectedHits))
+    }
+
+def pareto_front(results, accuracyKey='f1', speedKey='fps'):
+    '''
+    Find the results that no other result beats in both accuracy and speed.
+
+    Parameters:
+        {List} results - [
+                            {Dictionary} The evaluation of a single configuration
+                            ...
+                         ]
+        {String} accuracyKey - The name of the accuracy measure (higher is better)
+        {String} speedKey - The name of the speed measure (higher is better)
+
+    Returns:
+        {List} The Pareto-optimal results, from the most accurate to the fastest.
+    '''
+
+    # scan from the most accurate, keeping each result that's faster than all the more accurate ones
+    ordered = sorted(results, key=lambda r: (-r[accuracyKey], r['position_error'], -r[speedKey]))
+    front = []
+
+    for result in ordered:
+        if not len(front) or result[speedKey] > front[-1][speedKey]:
+            front.append(result)
+
+    return front
+
+def sweep(clipPath, targetArgs, grid, expectedHits=None, baseConfig=None, frames=None,
+          workers=None, stageCacheDir=None):
+    '''
+    Analyze a clip with every combination of the given parameter values in parallel,
+    and measure the accuracy and throughput of each configuration.
+
+    Parameters:
+        {String} clipPath - The path of the clip (preferably a raw frame store, see FrameCache)
+        {Tuple} targetArgs - (
+                                {Numpy.array} An image of the target that appears in the clip,
+                                {Tuple} The bull'seye location in the model image,
+                                {Number} Amount of rings in the target,
+                                {Number} The diameter of the most inner ring in the target image [px]
+                             )
+        {Dictionary} grid - {
+                               {String} The name of an AnalysisConfig value: {List} The values to try
+                               ...
+                            }
+        {List} expectedHits - The hits that should be detected, relative to the bull'seye point
+                              (see measure_accuracy), or None to compare with the base configuration's hits
+        {AnalysisConfig} baseConfig - The values of the parameters that are not in the grid
+                                      (None for the default thresholds)
+        {Number} frames - Maximum amount of frames to analyze (None for the whole clip)
+        {Number} workers - Amount of processes to use (defaults to the amount of CPU cores)
+        {String} stageCacheDir - The directory of a stage cache shared by all configurations,
+                                 or None to disable it. Configurations that share the early stages'
+                                 parameters then detect the target's features only once.
+                                 Warm the cache with a first sweep, so the throughput of all
+                                 configurations is measured over the same cached stages.
+
+    Returns:
+        {Tuple} (
+                   {List} [
+                              {Dictionary} {
+                                              'config': {AnalysisConfig} The evaluated configuration,
+                                              'fps': {Number} Analyzed frames per second,
+                                              'hits': {List} The detected hits,
+                                              ... (the product of measure_accuracy)
+                                           }
+                              ...
+                          ],
+                   {List} The Pareto-optimal results (see pareto_front)
+                )
+    '''
+
+    base_config = baseConfig if baseConfig != None else AnalysisConfig()
+    names = sorted(grid)
+    configs = [base_config.replace(**dict(zip(names, values)))
+               for values in itertools.product(*(grid[name] for name in names))]
+
+    # the base configuration is the reference when there are no expected hits
+    if expectedHits == None:
+        configs.insert(0, base_config)
+
+    jobs = [(clipPath, targetArgs, config.get_state(), frames, stageCacheDir) for config in configs]
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        evaluations = list(executor.map(_evaluate_config, jobs))
+
+    if expectedHits == None:
+        expectedHits = evaluations[0]['hits']
+        configs, evaluations = configs[1:], evaluations[1:]
+
+    results = []
+
+    for config, evaluation in zip(configs, evaluations):
+        result = measure_accuracy(evaluation['hits'], expectedHits, base_config.hit_distance_tolerance)
+        result['config'] = config
+        result['hits'] = evaluation['hits']
+        result['fps'] = evaluation['frames'] / evaluation['seconds'] if evaluation['seconds'] > 0 else 0
+        results.append(result)
+
+    return results, pareto_front(results)
+
+if __name__ == '__main__':
+    # input
+    model = cv2.imread('res/input/target.jpg')
+    clip_path = sys.argv[1] if len(sys.argv) > 1 else 'res/input/video.mp4'
+    bullseye_point = (325,309)
+    inner_diameter_px = 50
+    rings_amount = 6
+
+    grid = {
+        'ratio_threshold': [.6, .7, .8],
+        'lines_threshold': [80, 120, 160],
+        'min_verified_reputation': [10, 15]
+    }
+
+    results, front = sweep(clip_path, (model, bullseye_point, rings_amount, inner_diameter_px), grid,
+                           frames=300, stageCacheDir='res/output/stages')
+
+    print('f1 | precision | recall | position error [px] | fps | parameters')
+
+    for result in front:
+        values = result['config'].get_state()
+        print(round(result['f1'], 3), '|', round(result['precision'], 3), '|', round(result['recall'], 3), '|',
+              round(result['position_error'], 2), '|', round(result['fps'], 2), '|',
+              ', '.join(name + '=' + str(values[name]) for name in sorted(grid)))
\ No newline at end of file
@@ -0,0 +1,50 @@
+import numpy as np
+
+class PoseFilter:
+    def __init__(self, smoothing, resetDistance):
+        '''
+        Smooth the target's corners over time, using an exponential moving average,
+        so that the noise of each frame's homography estimate does not jitter the hits.
+
+        {Number} smoothing - The weight of each new measurement [0-1].
+                             1 disables smoothing, lower values produce a steadier pose.
+        {Number} resetDistance - The distance [px] that any of the corners has to move
+                                 in a single frame, in order to consider it a real movement of the camera
+                                 or the target. The filter then jumps to the new pose instead of easing into it.
+        '''
+
+        self.smoothing = smoothing
+        self.reset_distance = resetDistance
+        self.corners = None
+
+    def update(self, corners):
+        '''
+        Add a new measurement of the target's corners.
+
+        Parameters:
+            {Numpy.array} corners - The A, B, C, D corners of the target in the current frame [shape: (4, 1, 2)]
+
+        Returns:
+            {Numpy.array} The smoothed corners [shape: (4, 1, 2)].
+        '''
+
+        corners = np.float32(corners).reshape(-1, 1, 2)
+
+        if type(self.corners) == type(None):
+            self.corners = corners
+        else:
+            movement = np.linalg.norm(corners - self.corners, axis=2).max()
+
+            if movement > self.reset_distance:
+                self.corners = corners
+            else:
+                self.corners = self.corners + self.smoothing * (corners - self.corners)
+
+        return self.corners
+
+    def reset(self):
+        '''
+        Forget the current pose estimate.
+        '''
+
+        self.corners = None
\ No newline at end of file
@@ -0,0 +1,287 @@
+import GroupingMetre as grouper
+import numpy as np
+import datetime
+import sqlite3
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    archer TEXT NOT NULL,
+    date TEXT NOT NULL,
+    target TEXT NOT NULL,
+    video TEXT,
+    arrows INTEGER NOT NULL,
+    total_score INTEGER NOT NULL,
+    grouping_diameter REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS hits (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    x REAL NOT NULL,
+    y REAL NOT NULL,
+    score INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS sessions_by_archer ON sessions (archer, date);
+CREATE INDEX IF NOT EXISTS sessions_by_target ON sessions (target, date);
+CREATE INDEX IF NOT EXISTS sessions_by_date ON sessions (date);
+CREATE INDEX IF NOT EXISTS hits_by_session ON hits (session_id);
+'''
+
+def normalize_hits(hits, targetModel):
+    '''
+    Convert hits to the target's normalized coordinates,
+    in which the bull'seye point is (0, 0) and the outer ring's radius is 1.
+    Hits of different videos (and of different zoom levels) can then be compared.
+    The hits are taken from their statistics in the model's space, so each of them must have been observed
+    (see HitsManager.Hit.observe).
+
+    Parameters:
+        {List} hits - [
+                         {HitsManager.Hit} A verified hit
+                         ...
+                      ]
+        {TargetModel} targetModel - The target on which the hits are shot
+
+    Returns:
+        {Numpy.array} The normalized point of each hit [(x, y), ...].
+    '''
+
+    if not len(hits):
+        return np.zeros((0,2), np.float64)
+
+    # the hits' statistics are kept in the model's space, while their points are in the frame's space
+    if not all(h.observations for h in hits):
+        raise ValueError('Hits can only be normalized by their statistics in the model\'s space')
+
+    model_points = np.float64([h.model_mean for h in hits])
+    radius = targetModel.rings_amount * targetModel.inner_diam
+    return (model_points - np.float64(targetModel.bullseye)) / radius
+
+class ResultsStore:
+    def __init__(self, path, batchSize=100):
+        '''
+        A local database of the results of many sessions (SQLite),
+        indexed by archer, date and target type.
+        New sessions are inserted in batches, so that storing them does not slow down the analysis.
+
+        {String} path - The path of the database file (created if it does not exist)
+        {Number} batchSize - Amount of sessions that are kept in memory before they're written together
+        '''
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.batch_size = batchSize
+        self.pending_sessions = []
+        self.pending_hits = []
+
+    def add_session(self, archer, date, targetType, targetModel, verifiedHits, videoPath=None):
+        '''
+        Add the final scoreboard of a session.
+
+        Parameters:
+            {String} archer - The name of the archer
+            {datetime.date} date - The date of the session (or an ISO formatted string)
+            {String} targetType - The name of the target's type
+            {TargetModel} targetModel - The target on which the hits are shot
+            {List} verifiedHits - The verified hits at the end of the session
+            {String} videoPath - The path of the session's video
+        '''
+
+        points = normalize_hits(verifiedHits, targetModel)
+        scores = [int(h.score) for h in verifiedHits]
+
+        # the diameter is measured in the normalized coordinates as well (the outer ring's radius is 1)
+        diameter = grouper.measure_grouping_diameter(points) if len(points) >= 2 else 0.
+        date = date.isoformat() if isinstance(date, (datetime.date, datetime.datetime)) else str(date)
+
+        # the session's id is given by the database when it's written
+        session_index = len(self.pending_sessions)
+        self.pending_sessions.append((archer, date, targetType, videoPath, len(scores), sum(scores), diameter))
+
+        self.pending_hits.extend((session_index, float(x), float(y), score) for (x, y), score in zip(points, scores))
+
+        if len(self.pending_sessions) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        '''
+        Write all pending sessions in a single transaction.
+
+        Returns:
+            {List} The ids of the written sessions, in the order in which they were added.
+        '''
+
+        if not len(self.pending_sessions):
+            return []
+
+        sql = ('INSERT INTO sessions (archer, date, target, video, arrows, total_score, grouping_diameter) '
+               'VALUES (?, ?, ?, ?, ?, ?, ?)')
+
+        with self.connection:
+            # each session gets its id from the database, so that concurrent stores never share an id
+            session_ids = [self.connection.execute(sql, session).lastrowid for session in self.pending_sessions]
+            hits = [(session_ids[hit[0]],) + hit[1:] for hit in self.pending_hits]
+            self.connection.executemany('INSERT INTO hits VALUES (?, ?, ?, ?)', hits)
+
+        self.pending_sessions = []
+        self.pending_hits = []
+        return session_ids
+
+    def close(self):
+        '''
+        Write the pending sessions and close the database.
+        '''
+
+        self.flush()
+        self.connection.close()
+
+    def _query(self, sql, archer=None, targetType=None, since=None, until=None, suffix='', conditions=(),
+               cursor=False):
+        '''
+        Run a query over the sessions that match the given filters (None to ignore a filter).
+
+        Parameters:
+            {String} sql - The beginning of the query, up to its WHERE clause
+            {String} archer - The name of the archer
+            {String} targetType - The name of the target's type
+            {String} since - The first date of the sessions (ISO formatted)
+            {String} until - The last date of the sessions (ISO formatted)
+            {String} suffix - The end of the query, after its WHERE clause (e.g. GROUP BY)
+            {Tuple} conditions - More conditions that the sessions must meet
+            {Boolean} cursor - True to iterate over the rows one by one, instead of loading them all
+
+        Returns:
+            {List} The rows of the result (or a cursor over them).
+        '''
+
+        self.flush()
+        conditions = list(conditions)
+        params = []
+
+        for condition, value in [('sessions.archer = ?', archer), ('sessions.target = ?', targetType),
+                                 ('sessions.date >= ?', since), ('sessions.date <= ?', until)]:
+            if value != None:
+                conditions.append(condition)
+                params.append(str(value))
+
+        where = ' WHERE ' + ' AND '.join(conditions) if len(conditions) else ''
+        rows = self.connection.execute(sql + where + ' ' + suffix, params)
+        return rows if cursor else rows.fetchall()
+
+    def hits_heatmap(self, bins=20, archer=None, targetType=None, since=None, until=None):
+        '''
+        Count the hits in each cell of a grid over the target (see normalize_hits).
+        The cells are counted by the database, without loading the hits themselves.
+
+        Parameters:
+            {Number} bins - Amount of cells in each row and column of the grid
+            {String} archer - The name of the archer (None for all archers)
+            {String} targetType - The name of the target's type (None for all types)
+            {String} since - The first date of the sessions (None for no limit)
+            {String} until - The last date of the sessions (None for no limit)
+
+        Returns:
+            {Numpy.array} The amount of hits in each cell [rows, columns].
+                          Hits outside of the outer ring's square are not counted.
+        '''
+
+        cell = 'CAST((hits.{0} + 1) * {1} / 2 AS INTEGER)'
+        sql = ('SELECT ' + cell.format('y', int(bins)) + ', ' + cell.format('x', int(bins)) + ', COUNT(*) '
+               'FROM hits JOIN sessions ON sessions.id = hits.session_id')
+
+        inside = ('hits.x >= -1', 'hits.x < 1', 'hits.y >= -1', 'hits.y < 1')
+        rows = self._query(sql, archer, targetType, since, until, 'GROUP BY 1, 2', inside)
+
+        heatmap = np.zeros((bins, bins), np.int64)
+
+        for row, col, count in rows:
+            heatmap[row, col] = count
+
+        return heatmap
+
+    def average_scores(self, groupBy='archer', archer=None, targetType=None, since=None, until=None):
+        '''
+        Parameters:
+            {String} groupBy - The column by which the sessions are grouped ('archer', 'target' or 'date')
+            {String} archer - The name of the archer (None for all archers)
+            {String} targetType - The name of the target's type (None for all types)
+            {String} since - The first date of the sessions (None for no limit)
+            {String} until - The last date of the sessions (None for no limit)
+
+        Returns:
+            {List} [
+                      {Tuple} (
+                                 {String} The group's value,
+                                 {Number} Amount of sessions in the group,
+                                 {Number} The average total score of a session,
+                                 {Number} The average score of an arrow
+                              )
+                      ...
+                   ]
+        '''
+
+        if groupBy not in ['archer', 'target', 'date']:
+            raise ValueError('Sessions can only be grouped by archer, target or date')
+
+        sql = ('SELECT sessions.' + groupBy + ', COUNT(*), AVG(total_score), '
+               'CAST(SUM(total_score) AS REAL) / MAX(SUM(arrows), 1) FROM sessions')
+
+        return self._query(sql, archer, targetType, since, until, 'GROUP BY 1 ORDER BY 1')
+
+    def grouping_trend(self, archer=None, targetType=None, since=None, until=None):
+        '''
+        Parameters:
+            {String} archer - The name of the archer (None for all archers)
+            {String} targetType - The name of the target's type (None for all types)
+            {String} since - The first date of the sessions (None for no limit)
+            {String} until - The last date of the sessions (None for no limit)
+
+        Returns:
+            {List} [
+                      {Tuple} (
+                                 {String} The date,
+                                 {Number} Amount of sessions on that date,
+                                 {Number} The average grouping diameter on that date
+                                          (relative to the outer ring's radius)
+                              )
+                      ...
+                   ]
+                   Sessions with less than two arrows are not included.
+        '''
+
+        sql = 'SELECT date, COUNT(*), AVG(grouping_diameter) FROM sessions'
+        return self._query(sql, archer, targetType, since, until, 'GROUP BY 1 ORDER BY 1', ('arrows >= 2',))
+
+    def grouping_stats(self, bins=20, archer=None, targetType=None, since=None, until=None):
+        '''
+        Aggregate the groupings of all matching sessions, streaming their hits session by session.
+
+        Parameters:
+            {Number} bins - Amount of cells in each row and column of the hits' histogram
+            {String} archer - The name of the archer (None for all archers)
+            {String} targetType - The name of the target's type (None for all types)
+            {String} since - The first date of the sessions (None for no limit)
+            {String} until - The last date of the sessions (None for no limit)
+
+        Returns:
+            {GroupingMetre.GroupingStats} The accumulated statistics (see GroupingStats.get_summary).
+        '''
+
+        sql = 'SELECT hits.session_id, hits.x, hits.y FROM hits JOIN sessions ON sessions.id = hits.session_id'
+        stats = grouper.GroupingStats(bins)
+        session_id = None
+        points = []
+
+        for row in self._query(sql, archer, targetType, since, until, 'ORDER BY hits.session_id', cursor=True):
+            if row[0] != session_id:
+                stats.add_group(points)
+                session_id = row[0]
+                points = []
+
+            points.append(row[1:])
+
+        stats.add_group(points)
+        return stats
\ No newline at end of file
@@ -0,0 +1,139 @@
+import numpy as np
+import cv2
+
+VISIBLE = 0
+UNCHANGED = 1
+OCCLUDED = 2
+
+class SceneMonitor:
+    def __init__(self, skipFrames=12, changeThreshold=20, changedPixels=3, patience=24, endArrows=None, stableFrames=240):
+        '''
+        Detect idle stretches of a video (the target is out of sight, or nothing changes on it),
+        so that they can be fast-forwarded without decoding and analyzing every frame.
+
+        {Number} skipFrames - Amount of frames to skip at once during an idle stretch
+        {Number} changeThreshold - The minimum difference [0-255] of a pixel between a small thumbnail of a frame
+                                   and the one of the last analyzed frame, to consider the pixel changed
+        {Number} changedPixels - The minimum amount of changed pixels in the thumbnail to consider the scene changed
+        {Number} patience - Amount of analyzed frames in a row without finding the target,
+                            to consider it occluded or out of frame, and without any change in the scene,
+                            to start skipping frames in which nothing changes.
+                            It should be larger than the reputation needed to verify a hit.
+        {Number} endArrows - Amount of arrows in an end, after which the analysis can stop
+                             (None to analyze the whole video)
+        {Number} stableFrames - Amount of analyzed frames during which the amount of verified arrows
+                                has to stay the same after reaching the end's amount, to stop the analysis
+        '''
+
+        self.skip_frames = skipFrames
+        self.change_threshold = changeThreshold
+        self.changed_pixels = changedPixels
+        self.patience = patience
+        self.end_arrows = endArrows
+        self.stable_frames = stableFrames
+
+        self.thumbnail = None
+        self.frames_without_target = 0
+        self.arrows_amount = 0
+        self.frames_with_same_arrows = 0
+        self.quiet_frames = 0
+
+    def _create_thumbnail(self, frame):
+        '''
+        Parameters:
+            {Numpy.array} frame - The frame to shrink
+
+        Returns:
+            {Numpy.array} A tiny grayscale version of the frame.
+        '''
+
+        small = cv2.resize(frame, (128,72), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _is_changed(self, thumbnail):
+        '''
+        Parameters:
+            {Numpy.array} thumbnail - The thumbnail of a frame
+
+        Returns:
+            {Boolean} True if the frame is different from the last analyzed frame.
+        '''
+
+        if type(self.thumbnail) == type(None):
+            return True
+
+        difference = cv2.absdiff(thumbnail, self.thumbnail)
+        return np.count_nonzero(difference >= self.change_threshold) >= self.changed_pixels
+
+    def classify(self, frame):
+        '''
+        Classify a frame before analyzing it.
+
+        Parameters:
+            {Numpy.array} frame - The next frame of the video
+
+        Returns:
+            {Number} UNCHANGED if the frame does not need to be analyzed,
+                     OCCLUDED if the target has been out of sight lately,
+                     or VISIBLE otherwise [SceneMonitor constant].
+        '''
+
+        if self.frames_without_target >= self.patience:
+            return OCCLUDED
+
+        # the scene has been quiet for a while (long enough to verify any new hit),
+        # and the frame shows nothing new
+        if self.quiet_frames >= self.patience and not self._is_changed(self._create_thumbnail(frame)):
+            return UNCHANGED
+
+        return VISIBLE
+
+    def update(self, frame, result):
+        '''
+        Update the monitor with the result of an analyzed frame.
+
+        Parameters:
+            {Numpy.array} frame - The analyzed frame
+            {Dictionary} result - The result of VideoAnalyzer.process_frame
+        '''
+
+        thumbnail = self._create_thumbnail(frame)
+        changed = self._is_changed(thumbnail)
+        self.thumbnail = thumbnail
+
+        if type(result['bullseye']) == type(None):
+            self.frames_without_target += 1
+        else:
+            self.frames_without_target = 0
+
+        arrows_amount = len(result['verified'])
+
+        if arrows_amount == self.arrows_amount:
+            self.frames_with_same_arrows += 1
+        else:
+            self.arrows_amount = arrows_amount
+            self.frames_with_same_arrows = 0
+
+        if changed or self.frames_with_same_arrows == 0:
+            self.quiet_frames = 0
+        else:
+            self.quiet_frames += 1
+
+    def is_idle(self):
+        '''
+        Returns:
+            {Boolean} True if the frames after the last analyzed frame can be skipped.
+        '''
+
+        return self.frames_without_target >= self.patience
+
+    def is_over(self):
+        '''
+        Returns:
+            {Boolean} True if all of the end's arrows have been verified and stayed the same for a while.
+        '''
+
+        if self.end_arrows == None:
+            return False
+
+        return self.arrows_amount >= self.end_arrows and self.frames_with_same_arrows >= self.stable_frames
\ No newline at end of file
@@ -1,14 +1,190 @@
+import numpy as np
 import cv2
 
 class Sketcher:
-    def __init__(self, measureUnit, measureName):
+    def __init__(self, measureUnit, measureName, scale=1):
         '''
         {Number} measureUnit - Amount of pixels in one distance unit
         {String} measureName - The name of the measure unit
+        {Number} scale - The size of the images this sketcher draws on, relative to the analyzed frames.
+                         The hits' coordinates, the text and the lines are all scaled by it,
+                         so a small preview is rendered directly at its own resolution.
         '''
 
         self.measure_unit = measureUnit
         self.measure_name = measureName
+        self.scale = scale
+
+        # pre-rendered layers of the data block and of the verified hits' marks
+        self.data_layer = None
+        self.data_key = None
+        self.marks_layer = None
+        self.marks_key = None
+        self.marks_anchor = None
+
+    def scaled(self, scale):
+        '''
+        Parameters:
+            {Number} scale - The size of the images to draw on, relative to the analyzed frames
+
+        Returns:
+            {Sketcher} A sketcher with the same measure unit, that draws on images of the given scale.
+        '''
+
+        return Sketcher(self.measure_unit, self.measure_name, scale)
+
+    def _scale_point(self, point):
+        '''
+        Returns:
+            {Tuple} The point's coordinates on the image this sketcher draws on.
+        '''
+
+        return (int(point[0] * self.scale), int(point[1] * self.scale))
+
+    def _size(self, size):
+        '''
+        Returns:
+            {Number} A size [px] on the image this sketcher draws on (at least 1).
+        '''
+
+        return max(1, int(round(size * self.scale)))
+
+    def draw_analysis(self, img, candidateHits, verifiedHits, groupingContour, groupingDiameter):
+        '''
+        Draw the candidate hits and the overlay of a single analyzed frame.
+
+        Parameters:
+            {Numpy.array} img - The img on which to draw
+            {List} candidateHits - The hits that are yet to be verified
+            {List} verifiedHits - The verified hits
+            {Numpy.array} groupingContour - The external contour of the group, or None if there's no group
+            {Number} groupingDiameter - The diameter of the grouping [px]
+        '''
+
+        self.mark_hits(img, candidateHits, foreground=(0x0,0x0,0xff),
+                       diam=2, withOutline=False, withScore=False)
+
+        self.draw_overlay(img, verifiedHits, groupingContour, groupingDiameter)
+
+    def draw_overlay(self, img, verifiedHits, groupingContour, groupingDiameter):
+        '''
+        Draw the data block, the grouping and the verified hits.
+        Each layer of the overlay is rendered only when its data changes,
+        and otherwise copied onto the image as it is.
+
+        Parameters:
+            {Numpy.array} img - The img on which to draw
+            {List} verifiedHits - [
+                                     {HitsManager.Hit} A verified hit on the target
+                                     ...
+                                  ]
+            {Numpy.array} groupingContour - The external contour of the group, or None if there's no group
+            {Number} groupingDiameter - The diameter of the grouping [px]
+        '''
+
+        verified_scores = [h.score for h in verifiedHits]
+        arrows_amount = len(verified_scores)
+        total_score = sum(verified_scores)
+
+        # the data block changes only when a hit is verified or the grouping changes
+        data_key = (img.shape, arrows_amount, total_score, round(groupingDiameter * self.measure_unit, 1))
+
+        if data_key != self.data_key:
+            def draw_data(canvas):
+                self.draw_data_block(canvas)
+                self.type_arrows_amount(canvas, arrows_amount, (0x0,0x0,0xff))
+                self.type_total_score(canvas, total_score, arrows_amount * 10, (0x0,189,62))
+                self.type_grouping_diameter(canvas, groupingDiameter, (0xff,133,14))
+
+            self.data_layer = self._render_layer(img.shape, draw_data)
+            self.data_key = data_key
+
+        # the marks change only when the group of verified hits changes, or when the hits move
+        # relative to each other (e.g. hits projected through a new perspective),
+        # and otherwise follow the hits' shift
+        anchor = self._scale_point(verifiedHits[0].point) if arrows_amount > 0 else (0, 0)
+        relative_points = tuple((id(h), h.score) + tuple(np.subtract(self._scale_point(h.point), anchor))
+                                for h in verifiedHits)
+
+        if type(groupingContour) != type(None):
+            scaled_contour = (np.float32(groupingContour).reshape(-1, 2) * self.scale).astype(np.int32)
+            relative_contour = tuple((scaled_contour - np.int32(anchor)).ravel())
+        else:
+            relative_contour = None
+
+        marks_key = (img.shape, relative_points, relative_contour)
+
+        if marks_key != self.marks_key:
+            def draw_marks(canvas):
+                self.draw_grouping(canvas, groupingContour)
+                self.mark_hits(canvas, verifiedHits, foreground=(0x0,0xff,0x0),
+                               diam=5, withOutline=True, withScore=True)
+
+            self.marks_layer = self._render_layer(img.shape, draw_marks)
+            self.marks_key = marks_key
+            self.marks_anchor = anchor
+
+        if arrows_amount > 0:
+            offset = (anchor[0] - self.marks_anchor[0], anchor[1] - self.marks_anchor[1])
+            self._blend_layer(img, self.marks_layer, offset)
+
+        self._blend_layer(img, self.data_layer, (0, 0))
+
+    def _render_layer(self, shape, draw):
+        '''
+        Render a layer of the overlay and find which of its pixels are drawn.
+
+        Parameters:
+            {Tuple} shape - The shape of the images the layer is drawn on
+            {Function} draw - A function that draws the layer on a given image
+
+        Returns:
+            {Tuple} (
+                       {Numpy.array} The rendered layer,
+                       {Numpy.array} A mask of the drawn pixels,
+                       {Tuple} (
+                                  {Number} The left x coordinate of the drawn area,
+                                  {Number} The top y coordinate of the drawn area,
+                                  {Number} The right x coordinate of the drawn area,
+                                  {Number} The bottom y coordinate of the drawn area
+                               )
+                    )
+        '''
+
+        # draw on a black and on a white canvas, the drawn pixels are those that end up the same
+        canvases = [np.zeros(shape, np.uint8), np.full(shape, 0xff, np.uint8)]
+
+        for canvas in canvases:
+            draw(canvas)
+
+        mask = (canvases[0] == canvases[1]).all(axis=2)
+        ys, xs = np.nonzero(mask)
+        box = (xs.min(), ys.min(), xs.max() + 1, ys.max() + 1) if len(xs) > 0 else (0, 0, 0, 0)
+        return canvases[0], mask.astype(np.uint8), box
+
+    def _blend_layer(self, img, layer, offset):
+        '''
+        Copy the drawn pixels of a layer onto an image.
+
+        Parameters:
+            {Numpy.array} img - The img on which to draw
+            {Tuple} layer - The product of _render_layer
+            {Tuple} offset - (
+                                {Number} The horizontal translation of the layer [px],
+                                {Number} The vertical translation of the layer [px]
+                             )
+        '''
+
+        image, mask, (x0, y0, x1, y1) = layer
+        img_h, img_w, _ = img.shape
+        dx, dy = offset
+
+        # clip the translated drawn area to the image
+        x0, y0 = max(x0, -dx, 0), max(y0, -dy, 0)
+        x1, y1 = min(x1, img_w - dx, img_w), min(y1, img_h - dy, img_h)
+
+        if x0 < x1 and y0 < y1:
+            cv2.copyTo(image[y0:y1, x0:x1], mask[y0:y1, x0:x1], img[y0 + dy:y1 + dy, x0 + dx:x1 + dx])
 
     def draw_data_block(self, img):
         '''
@@ -24,24 +200,26 @@ class Sketcher:
         rect_0_end = (img_w, img_h)
         cv2.rectangle(img, rect_0_start, rect_0_end, (0xff,0xff,0xff), -1)
         
-        rect_1_start = (rect_0_start[0] - 60, int(img_h * .85))
-        rect_1_end = (rect_0_start[0] - 15, img_h)
+        gap = self._size(15)
+        
+        rect_1_start = (rect_0_start[0] - self._size(60), int(img_h * .85))
+        rect_1_end = (rect_0_start[0] - gap, img_h)
         cv2.rectangle(img, rect_1_start, rect_1_end, (0x28,0x28,0x28), -1)
         
-        rect_2_start = (rect_1_start[0] - 50, int(img_h * .85))
-        rect_2_end = (rect_1_start[0] - 15, img_h)
+        rect_2_start = (rect_1_start[0] - self._size(50), int(img_h * .85))
+        rect_2_end = (rect_1_start[0] - gap, img_h)
         cv2.rectangle(img, rect_2_start, rect_2_end, (248,138,8), -1)
         
-        rect_3_start = (rect_2_start[0] - 40, int(img_h * .85))
-        rect_3_end = (rect_2_start[0] - 15, img_h)
+        rect_3_start = (rect_2_start[0] - self._size(40), int(img_h * .85))
+        rect_3_end = (rect_2_start[0] - gap, img_h)
         cv2.rectangle(img, rect_3_start, rect_3_end, (66,0x0,0xff), -1)
         
-        rect_4_start = (rect_3_start[0] - 30, int(img_h * .85))
-        rect_4_end = (rect_3_start[0] - 15, img_h)
+        rect_4_start = (rect_3_start[0] - self._size(30), int(img_h * .85))
+        rect_4_end = (rect_3_start[0] - gap, img_h)
         cv2.rectangle(img, rect_4_start, rect_4_end, (0x0,204,0xff), -1)
         
-        rect_5_start = (rect_4_start[0] - 20, int(img_h * .85))
-        rect_5_end = (rect_4_start[0] - 15, img_h)
+        rect_5_start = (rect_4_start[0] - self._size(20), int(img_h * .85))
+        rect_5_end = (rect_4_start[0] - gap, img_h)
         cv2.rectangle(img, rect_5_start, rect_5_end, (0x0,204,0xff), -1)
 
     def mark_hits(self, img, hits, foreground, diam, withOutline, withScore):
@@ -61,30 +239,37 @@ class Sketcher:
         '''
 
         outline = (0x0,0x0,0x0)
+        font_scale = 5 * self.scale
         
         for hit in hits:
-            x, y = hit.point[0], hit.point[1]
+            x, y = self._scale_point(hit.point)
             score_string = str(hit.score) if (hit.score > 0) else 'miss'
             
             if withOutline:
-                cv2.circle(img, (x,y), 13, outline, diam + 2)
+                cv2.circle(img, (x,y), self._size(13), outline, self._size(diam + 2))
                 
-            cv2.circle(img, (x,y), 10, foreground, diam)
+            cv2.circle(img, (x,y), self._size(10), foreground, self._size(diam))
             
             if withScore:
-                cv2.putText(img, score_string, (x,y - 20), cv2.FONT_HERSHEY_PLAIN, 5, outline, thickness=15)
-                cv2.putText(img, score_string, (x,y - 20), cv2.FONT_HERSHEY_PLAIN, 5, (0xff,0xff,0xff), thickness=5)
+                text_point = (x,y - self._size(20))
+                cv2.putText(img, score_string, text_point, cv2.FONT_HERSHEY_PLAIN, font_scale, outline,
+                            thickness=self._size(15))
+
+                cv2.putText(img, score_string, text_point, cv2.FONT_HERSHEY_PLAIN, font_scale, (0xff,0xff,0xff),
+                            thickness=self._size(5))
 
     def draw_grouping(self, img, contour):
         '''
-        Mark hits on the target itself.
+        Draw the contour of the group of hits.
 
         Parameters:
             {Numpy.array} img - The img on which to draw
-            {Numpy.array} contour - The external contour of the group
+            {Numpy.array} contour - The external contour of the group, or None if there's no group
         '''
 
-        cv2.drawContours(img, contour, -1, (214,215,97), 2)
+        if type(contour) != type(None):
+            scaled_contour = (contour * self.scale).astype(np.int32)
+            cv2.drawContours(img, [scaled_contour], -1, (214,215,97), self._size(2))
 
     def type_arrows_amount(self, img, amount, dataColor):
         '''
@@ -98,11 +283,13 @@ class Sketcher:
 
         amount = str(amount)
         img_h, img_w, _ = img.shape
+        font_scale = 1.4 * self.scale
+        thickness = self._size(4)
         cv2.putText(img, 'Arrows shot: ', (int(img_w * .52), int(img_h * .905)),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.4, (0x0,0x0,0x0), 4)
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0x0,0x0,0x0), thickness)
         
         cv2.putText(img, amount, (int(img_w * .675), int(img_h * .905)),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.4, dataColor, 4)
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, dataColor, thickness)
 
     def type_grouping_diameter(self, img, diameter, dataColor):
         '''
@@ -116,11 +303,13 @@ class Sketcher:
 
         diameter = str(round(diameter * self.measure_unit, 1))
         img_h, img_w, _ = img.shape
+        font_scale = 1.4 * self.scale
+        thickness = self._size(4)
         cv2.putText(img, 'Grouping: ', (int(img_w * .77), int(img_h * .905)),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.4, (0x0,0x0,0x0), thickness=4)
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0x0,0x0,0x0), thickness=thickness)
         
         cv2.putText(img, diameter + self.measure_name, (int(img_w * .89), int(img_h * .905)),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.4, dataColor, 4)
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, dataColor, thickness)
 
     def type_total_score(self, img, totalScore, achievableScore, dataColor):
         '''
@@ -137,14 +326,16 @@ class Sketcher:
         totalScore = str(totalScore)
         achievableScore = str(achievableScore)
         score_digits = len(totalScore)
-        score_space = 23 * (score_digits - 1)
+        score_space = 23 * (score_digits - 1) * self.scale
         img_h, img_w, _ = img.shape
+        font_scale = 1.4 * self.scale
+        thickness = self._size(4)
         
         cv2.putText(img, 'Total score: ', (int(img_w * .52), int(img_h * .975)),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.4, (0x0,0x0,0x0), thickness=4)
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0x0,0x0,0x0), thickness=thickness)
         
         cv2.putText(img, totalScore, (int(img_w * .67), int(img_h * .975)),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.4, dataColor, 4)
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, dataColor, thickness)
         
         cv2.putText(img, '/ ' + achievableScore, (int(img_w * .695 + score_space), int(img_h * .975)),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.4, (0x0,0x0,0x0), 4)
\ No newline at end of file
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0x0,0x0,0x0), thickness)
\ No newline at end of file
@@ -0,0 +1,172 @@
+import Geometry2D as geo2D
+import numpy as np
+import threading
+import cv2
+
+class TargetModel:
+    def __init__(self, model, bullseye, ringsAmount, diamPx):
+        '''
+        {Numpy.array} model - An image of the target that appears in the analyzed frames
+        {Tuple} bullseye - (
+                              {Number} x coordinate of the bull'seye location in the model image,
+                              {Number} y coordinate of the bull'seye location in the model image
+                           )
+        {Number} ringsAmount - Amount of rings in the target
+        {Number} diamPx - The diameter of the most inner ring in the target image [px]
+        '''
+
+        self.model = model
+        self.bullseye = bullseye
+        self.rings_amount = ringsAmount
+        self.inner_diam = diamPx
+
+        # the model's features are detected only when the first frame is analyzed
+        self.sift = None
+        self.features = None
+        self.score_map = None
+
+        # padded model data, computed once for each frame size
+        self.fits = {}
+        self.fits_lock = threading.Lock()
+
+    def _detect_features(self):
+        '''
+        Returns:
+            {Tuple} (
+                       {list} The keypoints of the model image (without padding),
+                       {Numpy.array} The description of the model image
+                    )
+        '''
+
+        if self.features == None:
+            self.sift = cv2.xfeatures2d.SIFT_create()
+            self.features = self.sift.detectAndCompute(self.model, None)
+
+        return self.features
+
+    def fit(self, frameShape):
+        '''
+        Pad the model to the size of the analyzed frames and compute its features.
+        The features are detected once on the model image itself and only moved into place,
+        instead of detecting them over the whole padded image.
+        The result is cached, so that many analyzers with the same frame size
+        can share a single computation.
+
+        Parameters:
+            {Tuple} frameShape - (
+                                    {Number} The height of the frame [px],
+                                    {Number} The width of the frame [px],
+                                    {Number} The amount of channels in the frame
+                                 )
+
+        Returns:
+            {Tuple} (
+                       {Numpy.array} The model's A, B, C, D, E anchor points and the bull'seye point
+                                     in the padded model image,
+                       {Numpy.array} The padded model image,
+                       {list} The keypoints of the padded model,
+                       {Numpy.array} The description of the padded model
+                    )
+        '''
+
+        with self.fits_lock:
+            if frameShape not in self.fits:
+                anchor_points, pad_model = geo2D.zero_pad_as(self.model, frameShape)
+                anchor_a = anchor_points[0]
+                bullseye_anchor = (anchor_a[0] + self.bullseye[0],anchor_a[1] + self.bullseye[1])
+                anchor_points.append(bullseye_anchor)
+                anchor_points = np.float32(anchor_points).reshape(-1, 1, 2)
+                keys, model_desc = self._detect_features()
+                model_keys = [cv2.KeyPoint(k.pt[0] + anchor_a[0], k.pt[1] + anchor_a[1], k.size,
+                                           k.angle, k.response, k.octave, k.class_id) for k in keys]
+
+                self.fits[frameShape] = (anchor_points, pad_model, model_keys, model_desc)
+
+            return self.fits[frameShape]
+
+    def _create_score_map(self):
+        '''
+        Returns:
+            {Numpy.array} The score of each pixel of the model image, according to its ring.
+                          Pixels outside of the outer ring score 0.
+        '''
+
+        model_h, model_w = self.model.shape[:2]
+        mat_X, mat_Y = np.meshgrid(np.arange(model_w, dtype=np.float32) - self.bullseye[0],
+                                   np.arange(model_h, dtype=np.float32) - self.bullseye[1])
+
+        rings = (cv2.magnitude(mat_X, mat_Y) / self.inner_diam).astype(np.int32)
+        score_map = 10 - rings
+        score_map[rings >= self.rings_amount] = 0
+        return score_map.astype(np.uint8)
+
+    def unpad_homography(self, homography, frameShape):
+        '''
+        Parameters:
+            {Numpy.array} homography - The homography of the padded model over a frame
+            {Tuple} frameShape - The shape of the frame
+
+        Returns:
+            {Numpy.array} The homography of the model image itself over the frame.
+        '''
+
+        anchor_a = self.fit(frameShape)[0][0][0]
+        translation = np.array([[1, 0, anchor_a[0]], [0, 1, anchor_a[1]], [0, 0, 1]], np.float64)
+        return homography @ translation
+
+    def score_model_points(self, points):
+        '''
+        Parameters:
+            {Numpy.array} points - Points in the model image [(x, y), ...]
+
+        Returns:
+            {Numpy.array} The score of each point, according to the ring in which it falls.
+        '''
+
+        if type(self.score_map) == type(None):
+            self.score_map = self._create_score_map()
+
+        model_points = np.round(np.float32(points).reshape(-1, 2)).astype(np.int32)
+        model_h, model_w = self.score_map.shape
+        x, y = model_points[:,0], model_points[:,1]
+        inside = (x >= 0) & (x < model_w) & (y >= 0) & (y < model_h)
+        scores = np.zeros(len(model_points), np.uint8)
+        scores[inside] = self.score_map[y[inside], x[inside]]
+        return scores
+
+    def ring_boundary_distances(self, points):
+        '''
+        Parameters:
+            {Numpy.array} points - Points in the model image [(x, y), ...]
+
+        Returns:
+            {Numpy.array} The distance of each point from the closest ring boundary [px].
+                          A hit that's close to a boundary might as well belong to the neighbour ring.
+        '''
+
+        model_points = np.float32(points).reshape(-1, 2)
+        dists = np.hypot(model_points[:,0] - self.bullseye[0], model_points[:,1] - self.bullseye[1])
+        rings = np.floor(dists / self.inner_diam)
+
+        # the bull'seye point itself is not a boundary, and there's no boundary beyond the outer ring
+        to_inner = np.where(rings >= 1, dists - rings * self.inner_diam, np.inf)
+        to_outer = np.where(rings < self.rings_amount, (rings + 1) * self.inner_diam - dists, np.inf)
+        return np.minimum(to_inner, to_outer)
+
+    def to_model_points(self, points, homography, frameShape):
+        '''
+        Parameters:
+            {Numpy.array} points - The points in the frame [(x, y), ...]
+            {Numpy.array} homography - The homography of the padded model over the frame
+            {Tuple} frameShape - The shape of the frame
+
+        Returns:
+            {Numpy.array} The points mapped back to the model image [(x, y), ...].
+        '''
+
+        if not len(points):
+            return np.zeros((0,2), np.float32)
+
+        to_frame = self.unpad_homography(homography, frameShape)
+        frame_points = np.float32(points).reshape(-1, 1, 2)
+        return cv2.perspectiveTransform(frame_points, np.linalg.inv(to_frame)).reshape(-1, 2)
\ No newline at end of file
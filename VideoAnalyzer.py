@@ -1,47 +1,416 @@
+from concurrent.futures import ThreadPoolExecutor
+from AnalysisConfig import AnalysisConfig
 import HomographicMatcher as matcher
 import VisualAnalyzer as visuals
+from PoseFilter import PoseFilter
+from FramePool import FramePool
 import GroupingMetre as grouper
 import HitsManager as hitsMngr
 import Geometry2D as geo2D
+import SceneMonitor as scene
+from OverlayRenderer import ResultsRecorder
+import FrameCache
+import Checkpoint
 import numpy as np
+import time
 import cv2
+import os
 
 class VideoAnalyzer:
-    def __init__(self, videoPath, model, bullseye, ringsAmount, diamPx):
-        '''
-        {String} videoName - The path of the video to analyze
-        {Numpy.array} model - An image of the target that appears in the video
-        {Tuple} bullseye - (
-                              {Number} x coordinate of the bull'seye location in the model image,
-                              {Number} y coordinate of the bull'seye location in the model image
-                           )
-        {Number} ringsAmount - Amount of rings in the target
-        {Number} diamPx - The diameter of the most inner ring in the target image [px]
-        '''
-
-        self.cap = cv2.VideoCapture(videoPath)
-        _, test_sample = self.cap.read()
-        frameSize = test_sample.shape
-        self.rings_amount = ringsAmount
-        self.inner_diam = diamPx
-        self.model = model
-        self.frame_h, self.frame_w, _ = frameSize
-        self.sift = cv2.xfeatures2d.SIFT_create()
-
-        # calculate anchor points and model features
-        self.anchor_points, self.pad_model = geo2D.zero_pad_as(model, frameSize)
-        anchor_a = self.anchor_points[0]
-        bullseye_anchor = (anchor_a[0] + bullseye[0],anchor_a[1] + bullseye[1])
-        self.anchor_points.append(bullseye_anchor)
-        self.anchor_points = np.float32(self.anchor_points).reshape(-1, 1, 2)
-        self.model_keys, self.model_desc = self.sift.detectAndCompute(self.pad_model, None)
-
-    def _analyze_frame(self, frame):
+    def __init__(self, videoPath, targetModel, config=None):
+        '''
+        {String} videoPath - The path of the video (or of a raw frame store) to analyze,
+                             or None if the frames are fed directly to 'process_frame'
+        {TargetModel} targetModel - The target that appears in the video.
+                                    A single model can be shared among many analyzers.
+        {AnalysisConfig} config - The thresholds of the analysis (None for the default thresholds)
+        '''
+
+        self.config = config if config != None else AnalysisConfig()
+
+        self.target = targetModel
+        self.rings_amount = targetModel.rings_amount
+        self.inner_diam = targetModel.inner_diam
+        self.model = targetModel.model
+        self.sift = None
+        self.hits_tracker = hitsMngr.HitsTracker(self.config.candidate_capacity, self.config.candidate_max_age)
+        self.pose_filter = PoseFilter(self.config.pose_smoothing, self.config.pose_reset_distance)
+        self.buffers = FramePool()
+        self.grouping = grouper.Grouping()
+        self.stage_cache = None
+        self.executor = None
+        self.opencv_threads = None
+        self.first_result_time = None
+
+        # the last homography of the model image over the frame,
+        # and the frame copies of the hits that are tracked in the model's space
+        self.homography = None
+        self.frame_hits = {}
+
+        # the part of the feature matches that agreed with the last homography,
+        # and the last accepted homography, which is verified first in the next frame
+        self.inlier_ratio = 0.
+        self.seed_homography = None
+
+        # the last measurement of the target's outer ring (scale, radius),
+        # which is reused as long as the target's scale does not change
+        self.ring_estimate = None
+
+        if videoPath != None:
+            self.cap = FrameCache.open_capture(videoPath)
+            self.frame_w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.frame_h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+            # some streams do not report their size, so a sample frame is decoded instead
+            if not self.frame_w or not self.frame_h:
+                _, test_sample = self.cap.read()
+                self.frame_h, self.frame_w, _ = test_sample.shape
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        else:
+            self.cap = None
+
+    def use_stage_threads(self, threads=3):
+        '''
+        Run the independent stages of each frame's analysis (and the encoding of the output)
+        simultaneously on a small thread pool, to reduce the latency of a single frame.
+        OpenCV's own threads are reduced accordingly, so that the cores are not oversubscribed.
+
+        Parameters:
+            {Number} threads - Amount of stages that can run simultaneously
+        '''
+
+        self.release_stage_threads()
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.opencv_threads = cv2.getNumThreads()
+        cv2.setNumThreads(max(1, (os.cpu_count() or 1) // threads))
+
+    def release_stage_threads(self):
+        '''
+        Stop running stages simultaneously and restore OpenCV's threads.
+        '''
+
+        if self.executor != None:
+            self.executor.shutdown(wait=True)
+            cv2.setNumThreads(self.opencv_threads)
+            self.executor = None
+            self.opencv_threads = None
+
+    def _load_stage(self, stage, frameIndex, params):
+        '''
+        Returns:
+            {Dictionary} The cached product of an analysis stage,
+                         or None if it's not cached or stage caching is disabled.
+        '''
+
+        if self.stage_cache == None or frameIndex == None:
+            return None
+
+        return self.stage_cache.load(stage, frameIndex, params)
+
+    def _save_stage(self, stage, frameIndex, params, **arrays):
+        '''
+        Cache the product of an analysis stage, if stage caching is enabled.
+        '''
+
+        if self.stage_cache != None and frameIndex != None:
+            self.stage_cache.save(stage, frameIndex, params, **arrays)
+
+    def _find_homography(self, frame, frameIndex):
+        '''
+        Find the homography of the model over a frame.
+
+        Parameters:
+            {Numpy.array} frame - The frame to analyze
+            {Number} frameIndex - The index of the frame in the video, or None if it's unknown
+
+        Returns:
+            {Numpy.array} A 3x3 array representing the model's homography, or None if it's not found.
+        '''
+
+        _, _, model_keys, model_desc = self.target.fit(frame.shape)
+        ratio = self.config.ratio_threshold
+        seed = self.seed_homography if self.config.seed_inlier_ratio <= 1 else None
+
+        # the homography is refined from the previous frame's homography
+        params = (ratio, self.config.homography_method, self.config.homography_threshold,
+                  self.config.seed_inlier_ratio, FrameCache.state_fingerprint(seed))
+
+        # the frame's features do not depend on any parameter
+        features = self._load_stage('features', frameIndex, ())
+
+        if features != None:
+            train_keys = cv2.KeyPoint_convert(features['points'])
+            train_desc = features['descriptors'] if len(features['descriptors']) else None
+        else:
+            if self.sift == None:
+                self.sift = cv2.xfeatures2d.SIFT_create()
+
+            train_keys, train_desc = self.sift.detectAndCompute(frame, None)
+            points = cv2.KeyPoint_convert(train_keys) if len(train_keys) else np.zeros((0,2), np.float32)
+            descriptors = train_desc if type(train_desc) != type(None) else np.zeros((0,128), np.float32)
+            self._save_stage('features', frameIndex, (), points=points, descriptors=descriptors)
+
+        cached = self._load_stage('homography', frameIndex, params)
+
+        # products that were cached before the inliers were kept are computed again
+        if cached != None and 'inlier_ratio' in cached:
+            self.inlier_ratio = float(cached['inlier_ratio'])
+            return cached['homography'] if len(cached['homography']) else None
+
+        # find a match between the model image and the frame
+        matches = matcher.ratio_match_features(model_desc, train_desc, ratio) or []
+        homography = None
+        self.inlier_ratio = 0.
+
+        # start calculating homography (starting from the previous frame's homography)
+        if len(matches) >= 4:
+            homography, inliers = matcher.calc_homography(model_keys, train_keys, matches,
+                                                          self.config.homography_threshold,
+                                                          self.config.homography_method,
+                                                          seed, self.config.seed_inlier_ratio)
+
+            if type(inliers) != type(None):
+                self.inlier_ratio = float(np.count_nonzero(inliers)) / len(matches)
+
+        self._save_stage('homography', frameIndex, params,
+                         homography=homography if type(homography) != type(None) else np.zeros(0),
+                         inlier_ratio=self.inlier_ratio)
+
+        return homography
+
+    def _locate_target(self, frame, frameIndex):
+        '''
+        Find the target in a frame, smooth its pose and subtract the model from the frame
+        (or from the target's region of the frame, warped into the model's space).
+
+        Parameters:
+            {Numpy.array} frame - The frame to analyze
+            {Number} frameIndex - The index of the frame in the video, or None if it's unknown
+
+        Returns:
+            {Tuple} (
+                       {Numpy.array} The smoothed homography of the model over the frame,
+                                     or None if the target is not found,
+                       {Numpy.array} The difference between the frame and the model,
+                                     or None if the target is not found
+                    )
+        '''
+
+        frame_h, frame_w, _ = frame.shape
+        anchor_points, pad_model, _, _ = self.target.fit(frame.shape)
+        # the smoothed pose depends on the poses of the previous frames
+        history = FrameCache.state_fingerprint(self.pose_filter.corners, self.seed_homography)
+        params = (self.config.ratio_threshold, self.config.homography_method, self.config.homography_threshold,
+                  self.config.seed_inlier_ratio, self.config.max_stretch, self.config.blur_kernel,
+                  self.pose_filter.smoothing, self.pose_filter.reset_distance, self.config.rectified, history)
+        cached = self._load_stage('target', frameIndex, params)
+
+        if cached != None and 'inlier_ratio' in cached:
+            # continue the pose filter and the seed from where they were after the cached frame
+            corners = cached['corners']
+            seed = cached['seed']
+            self.pose_filter.corners = corners if len(corners) else None
+            self.seed_homography = seed if len(seed) else None
+            self.inlier_ratio = float(cached['inlier_ratio'])
+
+            if not cached['found']:
+                return None, None
+
+            homography = cv2.getPerspectiveTransform(anchor_points[:4], corners)
+            return homography, cached['diff']
+
+        homography = self._find_homography(frame, frameIndex)
+        sub_target = None
+
+        # check if homography succeeded and start warping the model over the detected object
+        if type(homography) != type(None):
+            warped_transform = cv2.perspectiveTransform(anchor_points, homography)
+            warped_vertices, warped_edges = geo2D.calc_vertices_and_edges(warped_transform)
+
+            # check if homography is good enough to continue
+            if matcher.is_true_homography(warped_vertices, warped_edges, (frame_w, frame_h),
+                                          self.config.max_stretch):
+                self.seed_homography = homography
+
+                # smooth the target's pose over time and continue with the smoothed homography
+                corners = self.pose_filter.update(warped_transform[:4])
+                homography = cv2.getPerspectiveTransform(anchor_points[:4], corners)
+                sub_target = self._subtract_target(frame, homography)
+            else:
+                homography = None
+
+        if type(homography) == type(None):
+            self.seed_homography = None
+
+        found = type(homography) != type(None)
+        corners = self.pose_filter.corners
+        seed = self.seed_homography
+
+        if self.stage_cache != None:
+            self._save_stage('target', frameIndex, params, found=found,
+                             corners=corners if type(corners) != type(None) else np.zeros(0),
+                             seed=seed if type(seed) != type(None) else np.zeros(0),
+                             diff=sub_target if found else np.zeros(0, np.uint8), inlier_ratio=self.inlier_ratio)
+
+        return homography, sub_target
+
+    def _subtract_target(self, frame, homography):
+        '''
+        Parameters:
+            {Numpy.array} frame - The frame to analyze
+            {Numpy.array} homography - The homography of the padded model over the frame
+
+        Returns:
+            {Numpy.array} The difference between the frame and the model,
+                          in the frame's space or in the model's space (if the analysis is rectified).
+        '''
+
+        frame_h, frame_w, _ = frame.shape
+
+        # warp only the target's region of the frame into the model's space and subtract the model
+        if self.config.rectified:
+            model_h, model_w, _ = self.model.shape
+            to_frame = self.target.unpad_homography(homography, frame.shape)
+            rectified_img = cv2.warpPerspective(frame, to_frame, (model_w, model_h),
+                                                flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+                                                dst=self.buffers.get('rectified', self.model.shape))
+
+            return visuals.subtract_background(rectified_img, self.model, self.buffers, self.config, self.executor)
+
+        # warp the input image over the filmed object and subtract it
+        else:
+            _, pad_model, _, _ = self.target.fit(frame.shape)
+            warped_img = cv2.warpPerspective(pad_model, homography, (frame_w, frame_h),
+                                             dst=self.buffers.get('warped', frame.shape))
+
+            return visuals.subtract_background(warped_img, frame, self.buffers, self.config, self.executor)
+
+    def _find_ring_radius(self, subTarget, bullseye, estimatedRadius, scale):
+        '''
+        Find the radius of the target's outer ring,
+        reusing the last measurement while the target's scale remains the same.
+
+        Parameters:
+            {Numpy.array} subTarget - The difference between the frame and the model
+            {Tuple} bullseye - The bull'seye point in the frame
+            {Number} estimatedRadius - The radius of the target according to its homography [px]
+            {Number} scale - The estimated size of the homography transformation
+                             divided by the size of the target model
+
+        Returns:
+            {Number} The target's current radius [px].
+        '''
+
+        if self.ring_estimate != None:
+            last_scale, last_radius = self.ring_estimate
+
+            if abs(scale / last_scale - 1) <= self.config.ring_rescale_tolerance:
+                return last_radius * scale / last_scale
+
+        radius = visuals.find_outer_ring(subTarget, estimatedRadius, self.config, bullseye)
+
+        # the fallback estimation is not kept, so the ring is searched again in the next frame
+        if radius != estimatedRadius:
+            self.ring_estimate = (scale, radius)
+
+        return radius
+
+    def _find_rectified_hits(self, subTarget, anchorPoints):
+        '''
+        Find the hits in the model's space.
+        The image size and the target's rings are fixed there,
+        so the outer ring's radius is known and there's no need to look for it.
+
+        Parameters:
+            {Numpy.array} subTarget - The difference between the rectified frame and the model
+            {Numpy.array} anchorPoints - The model's anchor points in the padded model image
+
+        Returns:
+            {list} [
+                       {HitsManager.Hit} A hit in the model's space
+                       ...
+                   ]
+        '''
+
+        # the target is not distorted in the model's space
+        model_vertices, _ = geo2D.calc_vertices_and_edges(anchorPoints - anchorPoints[0])
+        scale = (1, 1, 1)
+        bullseye = model_vertices[5]
+        radius = self.rings_amount * self.inner_diam
+
+        # the distances from the bull'seye point never change in the model's space
+        pixel_distances = self.buffers.cached('model_distances',
+                                              lambda: geo2D.calc_distances_from(self.model.shape, bullseye))
+
+        _, emphasized_lines = visuals.emphasize_lines(subTarget, pixel_distances, radius, self.buffers,
+                                                      self.config, radius)
+
+        proj_contours = visuals.reproduce_proj_contours(emphasized_lines, pixel_distances, bullseye, radius,
+                                                        self.buffers, self.config)
+
+        suspect_hits = visuals.find_suspect_hits(proj_contours, model_vertices, scale)
+        model_points = np.float32([hit[4] for hit in suspect_hits]).reshape(-1, 2)
+        scores = self.target.score_model_points(model_points)
+        boundary_dists = self.target.ring_boundary_distances(model_points)
+        return hitsMngr.create_scoreboard(suspect_hits, scores, model_points, boundary_dists, self.inlier_ratio)
+
+    def _project_result(self, result):
+        '''
+        Map the hits and the grouping of a rectified analysis from the model's space
+        into the last frame in which the target was found, for drawing.
+        Each tracked hit keeps the same frame copy along the session.
+
+        Parameters:
+            {Dictionary} result - The product of process_frame
+
+        Returns:
+            {Tuple} (
+                       {List} The candidate hits in the frame,
+                       {List} The verified hits in the frame,
+                       {Numpy.array} The grouping contour in the frame, or None if there's no group
+                    )
+        '''
+
+        if type(self.homography) == type(None):
+            return [], [], None
+
+        candidate_hits = result['candidates']
+        verified_hits = result['verified']
+        hits = candidate_hits + verified_hits
+        frame_hits = {}
+
+        if len(hits):
+            bullseye = tuple(cv2.perspectiveTransform(np.float32([[self.target.bullseye]]), self.homography)[0][0])
+            model_points = np.float32([hit.point for hit in hits]).reshape(-1, 1, 2)
+            frame_points = cv2.perspectiveTransform(model_points, self.homography).reshape(-1, 2)
+
+            for hit, point in zip(hits, frame_points):
+                frame_hit = self.frame_hits.get(id(hit)) or hitsMngr.Hit(0, 0, hit.score, bullseye)
+                frame_hit.point = (int(point[0]), int(point[1]))
+                frame_hit.score = hit.score
+                frame_hit.reputation = hit.reputation
+                frame_hit.bullseye_relation = bullseye
+                frame_hits[id(hit)] = frame_hit
+
+        # forget the copies of the hits that are not tracked anymore
+        self.frame_hits = frame_hits
+        contour = result['grouping_contour']
+
+        if type(contour) != type(None):
+            contour = cv2.perspectiveTransform(np.float32(contour), self.homography).astype(np.int32)
+
+        return ([frame_hits[id(h)] for h in candidate_hits],
+                [frame_hits[id(h)] for h in verified_hits],
+                contour)
+
+    def _analyze_frame(self, frame, frameIndex=None):
         '''
         Analyze a single frame.
 
         Parameters:
             {Numpy.array} frame - The frame to analyze
+            {Number} frameIndex - The index of the frame in the video, used to cache the early stages
+                                  of the analysis (None to analyze without caching)
 
         Returns:
             {Tuple} (
@@ -62,117 +431,321 @@ class VideoAnalyzer:
 
         # set default analysis meta-data
         scoreboard = []
-        scores = []
         bullseye_point = None
+        anchor_points, _, _, _ = self.target.fit(frame.shape)
+        homography, sub_target = self._locate_target(frame, frameIndex)
 
-        # find a match between the model image and the frame
-        matches, (train_keys, train_desc) = matcher.ratio_match(self.sift, self.model_desc, frame, .7)
+        if type(homography) != type(None):
+            self.homography = self.target.unpad_homography(homography, frame.shape)
 
-        # start calculating homography
-        if len(matches) >= 4:
-            homography = matcher.calc_homography(self.model_keys, train_keys, matches)
-
-            # check if homography succeeded and start warping the model over the detected object
-            if type(homography) != type(None):
-                warped_transform = cv2.perspectiveTransform(self.anchor_points, homography)
-                warped_vertices, warped_edges = geo2D.calc_vertices_and_edges(warped_transform)
-                bullseye_point = warped_vertices[5]
-
-                # check if homography is good enough to continue
-                if matcher.is_true_homography(warped_vertices, warped_edges, (self.frame_w, self.frame_h), .2):
-                    # warp the input image over the filmed object and calculate the scale difference
-                    warped_img = cv2.warpPerspective(self.pad_model, homography, (self.frame_w, self.frame_h))
-                    scale = geo2D.calc_model_scale(warped_edges, self.model.shape)
-                    
-                    # process image
-                    sub_target = visuals.subtract_background(warped_img, frame)
-                    pixel_distances = geo2D.calc_distances_from(frame.shape, warped_vertices[5])
-                    estimated_warped_radius = self.rings_amount * self.inner_diam * scale[2]
-                    circle_radius, emphasized_lines = visuals.emphasize_lines(sub_target, pixel_distances,
-                                                                    estimated_warped_radius)
-                    
-                    proj_contours = visuals.reproduce_proj_contours(emphasized_lines, pixel_distances,
-                                                                    warped_vertices[5], circle_radius)
-                    
-                    suspect_hits = visuals.find_suspect_hits(proj_contours, warped_vertices, scale)
-
-                    # calculate hits and draw circles around them
-                    scoreboard = hitsMngr.create_scoreboard(suspect_hits, scale, self.rings_amount, self.inner_diam)
+        if type(homography) != type(None) and self.config.rectified:
+            bullseye_point = cv2.perspectiveTransform(anchor_points, homography)[5][0]
+            scoreboard = self._find_rectified_hits(sub_target, anchor_points)
+
+        elif type(homography) != type(None):
+            warped_transform = cv2.perspectiveTransform(anchor_points, homography)
+            warped_vertices, warped_edges = geo2D.calc_vertices_and_edges(warped_transform)
+            bullseye_point = warped_vertices[5]
+            scale = geo2D.calc_model_scale(warped_edges, self.model.shape)
+
+            # process image (the distances field does not depend on the target's outer ring)
+            estimated_warped_radius = self.rings_amount * self.inner_diam * scale[2]
+
+            if self.executor != None:
+                distances_future = self.executor.submit(geo2D.calc_distances_from, frame.shape,
+                                                        warped_vertices[5], self.buffers)
+
+                circle_radius = self._find_ring_radius(sub_target, warped_vertices[5], estimated_warped_radius,
+                                                       scale[2])
+
+                pixel_distances = distances_future.result()
+            else:
+                pixel_distances = geo2D.calc_distances_from(frame.shape, warped_vertices[5], self.buffers)
+                circle_radius = self._find_ring_radius(sub_target, warped_vertices[5], estimated_warped_radius,
+                                                       scale[2])
+
+            circle_radius, emphasized_lines = visuals.emphasize_lines(sub_target, pixel_distances,
+                                                            estimated_warped_radius, self.buffers, self.config,
+                                                            circle_radius)
+            
+            proj_contours = visuals.reproduce_proj_contours(emphasized_lines, pixel_distances,
+                                                            warped_vertices[5], circle_radius, self.buffers,
+                                                            self.config)
+            
+            suspect_hits = visuals.find_suspect_hits(proj_contours, warped_vertices, scale)
+
+            # score the hits by mapping them back to the model's rings
+            hit_points = [hit[4] for hit in suspect_hits]
+            model_points = self.target.to_model_points(hit_points, homography, frame.shape)
+            scores = self.target.score_model_points(model_points)
+            boundary_dists = self.target.ring_boundary_distances(model_points)
+            scoreboard = hitsMngr.create_scoreboard(suspect_hits, scores, model_points, boundary_dists,
+                                                    self.inlier_ratio)
 
         return bullseye_point, scoreboard
 
-    def analyze(self, outputName, sketcher):
+    def process_frame(self, frame, frameIndex=None):
+        '''
+        Analyze a single frame and update the hits that are tracked along the session.
+
+        Parameters:
+            {Numpy.array} frame - The next frame of the session
+            {Number} frameIndex - The index of the frame in the video, used to cache the early stages
+                                  of the analysis (None to analyze without caching)
+
+        Returns:
+            {Dictionary} {
+                            'bullseye': {Tuple} The bull'seye point in the frame, or None if the target is not found,
+                            'candidates': {List} The hits that are yet to be verified,
+                            'verified': {List} The verified hits,
+                            'grouping_contour': {Numpy.array} The contour around the verified hits,
+                                                or None if there's no group,
+                            'grouping_diameter': {Number} The diameter of the grouping contour [px],
+                            'grouping_mean_radius': {Number} The average distance of the verified hits
+                                                    from their center [px],
+                            'grouping_offset': {Number} The distance of the verified hits' center
+                                               from the bull'seye point [px]
+                         }
+                         When the analysis is rectified, the hits and the grouping are in the model's space.
+        '''
+
+        bullseye, scoreboard = self._analyze_frame(frame, frameIndex)
+
+        # increase reputation of consistent hits
+        # or add them as new candidates
+        for hit in scoreboard:
+            self.hits_tracker.sort_hit(hit, self.config.hit_distance_tolerance, self.config.min_verified_reputation)
+
+        # decrease reputation of inconsistent hits
+        self.hits_tracker.discharge_hits()
+
+        # stabilize all hits according to the slightly shifted bull'seye point
+        # (the hits of a rectified analysis never move)
+        if type(bullseye) != type(None) and not self.config.rectified:
+            self.hits_tracker.shift_hits(bullseye)
+
+        # reference hit groups
+        candidate_hits = self.hits_tracker.get_hits(hitsMngr.CANDIDATE)
+        verified_hits = self.hits_tracker.get_hits(hitsMngr.VERIFIED)
+
+        # extract grouping data
+        self.grouping.update(verified_hits)
+
+        if self.first_result_time == None:
+            self.first_result_time = time.time()
+
+        return {
+            'bullseye': bullseye,
+            'candidates': candidate_hits,
+            'verified': verified_hits,
+            'grouping_contour': self.grouping.contour,
+            'grouping_diameter': self.grouping.diameter,
+            'grouping_mean_radius': self.grouping.mean_radius,
+            'grouping_offset': self.grouping.centroid_offset
+        }
+
+    def get_state(self):
+        '''
+        Returns:
+            {Dictionary} The session's state (tracked hits, target pose and grouping),
+                         consisting only of lists, numbers and booleans.
+        '''
+
+        corners = self.pose_filter.corners
+
+        return {
+            'hits': self.hits_tracker.get_state(),
+            'pose': corners.reshape(-1, 2).tolist() if type(corners) != type(None) else None,
+            'grouping_diameter': float(self.grouping.diameter)
+        }
+
+    def set_state(self, state):
+        '''
+        Continue a session from a saved state.
+
+        Parameters:
+            {Dictionary} state - The product of get_state
+        '''
+
+        self.hits_tracker.set_state(state['hits'])
+        pose = state['pose']
+        self.pose_filter.corners = np.float32(pose).reshape(-1, 1, 2) if pose != None else None
+        self.grouping = grouper.Grouping()
+        self.grouping.update(self.hits_tracker.get_hits(hitsMngr.VERIFIED))
+        self.ring_estimate = None
+
+    def _skip_frames(self, amount):
+        '''
+        Move the video forward without decoding the skipped frames.
+
+        Parameters:
+            {Number} amount - Amount of frames to skip
+        '''
+
+        for _ in range(amount):
+            if not self.cap.grab():
+                break
+
+    def analyze(self, outputName, sketcher, checkpointPath=None, checkpointInterval=1000, resume=False,
+                sceneMonitor=None, previewWidth=1153, resultsPath=None):
         '''
         Analyze a video completely and output the same video, with additional data written in it.
+        A live preview is rendered separately, directly at its own (smaller) resolution,
+        so the full resolution frame is drawn on only when the output is archived.
+
+        When a checkpoint path is given, the state of the analysis is saved every few frames,
+        and the output is split into segments ('output_000.mp4', 'output_001.mp4', ...),
+        each starting at a checkpoint. After a failure, the analysis can resume
+        from the last checkpoint, losing only the frames that followed it.
 
         Parameters:
-            {String} outputName - The path of the output file
+            {String} outputName - The path of the output file, or None to only display the preview
             {Sketcher} sketcher - A Sketcher object to use when writing the data to the output video
+            {String} checkpointPath - The path of the checkpoint file, or None to disable checkpoints
+            {Number} checkpointInterval - Amount of frames between two checkpoints
+            {Boolean} resume - True to continue from the checkpoint file, if it exists
+            {SceneMonitor} sceneMonitor - A monitor that detects idle stretches of the video,
+                                          which are then fast-forwarded and left out of the output,
+                                          or None to analyze every frame
+            {Number} previewWidth - The width of the live preview [px] (its height keeps the frame's ratio),
+                                    or None to disable the preview
+            {String} resultsPath - The path of a file in which to record the drawn results of each frame,
+                                   so the output can be rendered again by OverlayRenderer (None to disable)
         '''
 
         # set output configurations
         frame_size = (self.frame_w, self.frame_h)
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(outputName, fourcc, 24.0, frame_size)
+        checkpoints = checkpointPath != None
+        archive = outputName != None
+        segment = 0
+        loaded = False
+        out = None
+
+        if previewWidth != None:
+            preview_scale = previewWidth / self.frame_w
+            preview_size = (previewWidth, int(round(self.frame_h * preview_scale)))
+            preview_sketcher = sketcher.scaled(preview_scale)
+
+        if checkpoints and resume:
+            checkpoint = Checkpoint.load(checkpointPath)
+            loaded = checkpoint != None
+
+            if loaded:
+                self.set_state(checkpoint['analyzer'])
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, checkpoint['position'])
+                segment = checkpoint['segment']
+
+        # the recorded results of the previous run continue only from a loaded checkpoint
+        recorder = ResultsRecorder(resultsPath, append=loaded) if resultsPath != None else None
+
+        if archive:
+            output_path = Checkpoint.segment_path(outputName, segment) if checkpoints else outputName
+            out = cv2.VideoWriter(output_path, fourcc, 24.0, frame_size)
+
+        frames_since_checkpoint = 0
+        writing = None
 
         while True:
+            frame_index = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
             ret, frame = self.cap.read()
 
             if ret:
-                bullseye, scoreboard = self._analyze_frame(frame)
-                
-                # increase reputation of consistent hits
-                # or add them as new candidates
-                for hit in scoreboard:
-                    hitsMngr.sort_hit(hit, 30, 15)
-                
-                # decrease reputation of inconsistent hits
-                hitsMngr.discharge_hits()
-                
-                # stabilize all hits according to the slightly shifted bull'seye point
-                if type(bullseye) != type(None):
-                    hitsMngr.shift_hits(bullseye)
-
-                # reference hit groups
-                candidate_hits = hitsMngr.get_hits(hitsMngr.CANDIDATE)
-                verified_hits = hitsMngr.get_hits(hitsMngr.VERIFIED)
-                    
-                # extract grouping data
-                grouping_contour = grouper.create_group_polygon(frame, verified_hits)
-                has_group = type(grouping_contour) != type(None)
-                grouping_diameter = grouper.measure_grouping_diameter(grouping_contour) if has_group else 0
-                    
-                # write meta data on frame
-                sketcher.draw_meta_data_block(frame)
-                verified_scores = [h.score for h in verified_hits]
-                arrows_amount = len(verified_scores)
-                sketcher.type_arrows_amount(frame, arrows_amount, (0x0,0x0,0xff))
-                sketcher.type_total_score(frame, sum(verified_scores), arrows_amount * 10, (0x0,189,62))
-                sketcher.type_grouping_diameter(frame, grouping_diameter, (0xff,133,14))
-                
-                # mark hits and grouping
-                sketcher.draw_grouping(frame, grouping_contour)
-                sketcher.mark_hits(frame, candidate_hits, foreground=(0x0,0x0,0xff),
-                                   diam=2, withOutline=False, withScore=False)
-                
-                sketcher.mark_hits(frame, verified_hits, foreground=(0x0,0xff,0x0),
-                                   diam=5, withOutline=True, withScore=True)
-                
-                # display
-                frame_resized = cv2.resize(frame, (1153, 648))
-                cv2.imshow('Analysis', frame_resized)
-                
-                # write frame to output file
-                out.write(frame)
+                # fast-forward while nothing changes on the target
+                if sceneMonitor != None and sceneMonitor.classify(frame) == scene.UNCHANGED:
+                    self._skip_frames(sceneMonitor.skip_frames)
+                    continue
+
+                result = self.process_frame(frame, frame_index)
+
+                # the monitor compares the next frames to this one before it's drawn on
+                if sceneMonitor != None:
+                    sceneMonitor.update(frame, result)
+
+                grouping_diameter = result['grouping_diameter']
+
+                if self.config.rectified:
+                    candidate_hits, verified_hits, grouping_contour = self._project_result(result)
+                else:
+                    candidate_hits = result['candidates']
+                    verified_hits = result['verified']
+                    grouping_contour = result['grouping_contour']
+
+                if recorder != None:
+                    recorder.record(frame_index, result['bullseye'], candidate_hits, verified_hits,
+                                    grouping_contour, grouping_diameter)
+
+                # display a preview that's drawn on at its own resolution
+                if previewWidth != None:
+                    preview = cv2.resize(frame, preview_size)
+                    preview_sketcher.draw_analysis(preview, candidate_hits, verified_hits,
+                                                   grouping_contour, grouping_diameter)
+
+                    cv2.imshow('Analysis', preview)
+
+                if archive:
+                    # mark hits and write meta data on the full resolution frame
+                    sketcher.draw_analysis(frame, candidate_hits, verified_hits, grouping_contour, grouping_diameter)
+
+                    # write frame to output file (encoding it while the next frame is analyzed)
+                    if writing != None:
+                        writing.result()
+
+                    if self.executor != None:
+                        writing = self.executor.submit(out.write, frame)
+                    else:
+                        out.write(frame)
+
+                frames_since_checkpoint += 1
+
+                # close the current segment and save the state that the next one starts from
+                if checkpoints and frames_since_checkpoint >= checkpointInterval:
+                    if writing != None:
+                        writing.result()
+                        writing = None
+
+                    if archive:
+                        out.release()
+
+                    segment += 1
+                    Checkpoint.save(checkpointPath, {
+                        'position': int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)),
+                        'segment': segment,
+                        'analyzer': self.get_state()
+                    })
+
+                    if archive:
+                        out = cv2.VideoWriter(Checkpoint.segment_path(outputName, segment), fourcc, 24.0, frame_size)
+
+                    frames_since_checkpoint = 0
+
+                if sceneMonitor != None:
+                    if sceneMonitor.is_over():
+                        print('All arrows of the end are verified.')
+                        break
+
+                    # fast-forward while the target is out of sight
+                    if sceneMonitor.is_idle():
+                        self._skip_frames(sceneMonitor.skip_frames)
                 
-                if cv2.waitKey(1) & 0xff == 27:
+                if previewWidth != None and cv2.waitKey(1) & 0xff == 27:
                     break
             else:
                 print('Video stream is over.')
                 break
                 
-        # close window properly
+        if writing != None:
+            writing.result()
+
         self.cap.release()
-        out.release()
-        cv2.destroyAllWindows()
-        cv2.waitKey(1)
\ No newline at end of file
+
+        if archive:
+            out.release()
+
+        if recorder != None:
+            recorder.close()
+
+        # close window properly
+        if previewWidth != None:
+            cv2.destroyAllWindows()
+            cv2.waitKey(1)
\ No newline at end of file
@@ -1,37 +1,140 @@
 import ContourClassifier as cntr
+from AnalysisConfig import AnalysisConfig
+from FramePool import FramePool
 import Geometry2D as geo2D
 import numpy as np
 import cv2
 
-def subtract_background(query, subtrahend):
+DEFAULT_CONFIG = AnalysisConfig()
+
+def morph_kernel(size, buffers):
+    '''
+    Parameters:
+        {Number} size - The size of the kernel
+        {FramePool} buffers - A pool of buffers to reuse instead of allocating new images
+
+    Returns:
+        {Numpy.array} A square morphology kernel.
+    '''
+
+    return buffers.cached(('morph_kernel', size), lambda: np.ones((size,size), np.uint8))
+
+def clear_outside(img, distances, radius, buffers):
+    '''
+    Zero out all pixels that are further than the given radius from the bull'seye point.
+    This function modifies the argument image.
+
+    Parameters:
+        {Numpy.array} img - The image to edit
+        {Tuple} distances - The product of Geometry2D.calc_distances_from for the bull'seye point
+        {Number} radius - The radius around the bull'seye point that should be kept
+        {FramePool} buffers - A pool of buffers to reuse instead of allocating new images
+    '''
+
+    inside = cv2.compare(distances[1], float(radius), cv2.CMP_LE, dst=buffers.get('inside', img.shape))
+    cv2.bitwise_and(img, inside, dst=img)
+
+def blur_gray(img, name, buffers, config=DEFAULT_CONFIG):
+    '''
+    Parameters:
+        {Numpy.array} img - The image to convert [RGB]
+        {String} name - The name of the image's buffers
+        {FramePool} buffers - A pool of buffers to reuse instead of allocating new images
+        {AnalysisConfig} config - The thresholds of the analysis
+
+    Returns:
+        {Numpy.array} A blurred grayscale version of the image.
+    '''
+
+    gray_shape = img.shape[:2]
+    kernel = (config.blur_kernel, config.blur_kernel)
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY, dst=buffers.get('gray_' + name, gray_shape))
+    return cv2.GaussianBlur(gray, kernel, 0, dst=buffers.get('blur_' + name, gray_shape))
+
+def subtract_background(query, subtrahend, buffers=None, config=DEFAULT_CONFIG, executor=None):
     '''
     Subtract two images, so only the difference between them is left.
 
     Parameters:
         {Numpy.array} query - The image from which the background is subtracted [RGB]
         {Numpy.array} subtrahend - The background to subtract from the query [RGB]
+        {FramePool} buffers - A pool of buffers to reuse instead of allocating new images
+        {AnalysisConfig} config - The thresholds of the analysis
+        {Executor} executor - A thread pool on which the subtrahend is prepared
+                              while the query is prepared on the calling thread (None to prepare both in turn)
 
     Returns:
         {Numpy.array} The difference image.
     '''
 
-    # convert to grayscale
-    gray_query = cv2.cvtColor(query, cv2.COLOR_RGB2GRAY)
-    gray_subtrahend = cv2.cvtColor(subtrahend, cv2.COLOR_RGB2GRAY)
+    if buffers == None:
+        buffers = FramePool()
+
+    gray_shape = query.shape[:2]
 
-    # apply gaussian blur
-    kernel = (3,3)
-    gray_query = cv2.GaussianBlur(gray_query, kernel, 0)
-    gray_subtrahend = cv2.GaussianBlur(gray_subtrahend, kernel, 0)
+    # convert to grayscale and apply gaussian blur
+    if executor != None:
+        subtrahend_future = executor.submit(blur_gray, subtrahend, 'subtrahend', buffers, config)
+        gray_query = blur_gray(query, 'query', buffers, config)
+        gray_subtrahend = subtrahend_future.result()
+    else:
+        gray_query = blur_gray(query, 'query', buffers, config)
+        gray_subtrahend = blur_gray(subtrahend, 'subtrahend', buffers, config)
 
     # apply a black area on the subtrahend image
-    gray_subtrahend[gray_query == 0] = 0
+    query_area = cv2.threshold(gray_query, 0, 0xff, cv2.THRESH_BINARY, dst=buffers.get('query_area', gray_shape))[1]
+    cv2.bitwise_and(gray_subtrahend, query_area, dst=gray_subtrahend)
 
     # calculate diff
-    diff = cv2.absdiff(gray_subtrahend, gray_query)
+    diff = cv2.absdiff(gray_subtrahend, gray_query, dst=buffers.get('diff', gray_shape))
     return diff
 
-def emphasize_lines(img, distances, estimatedRadius):
+def find_outer_ring(img, estimatedRadius, config=DEFAULT_CONFIG, center=None):
+    '''
+    Parameters:
+        {Numpy.array} img - The difference image of the target
+        {Number} estimatedRadius - A rough estimation of the target's radius,
+                                   that will be used if for some reason it cannot be calculated on the fly.
+        {AnalysisConfig} config - The thresholds of the analysis
+        {Tuple} center - The bull'seye point, around which the ring is searched in a downsampled crop
+                         of the image, or None to search the whole image in its full resolution
+
+    Returns:
+        {Number} The target's current radius [px].
+    '''
+
+    min_radius = estimatedRadius * config.circle_min_radius_ratio
+    max_radius = estimatedRadius * config.circle_radius_margin
+    factor = 1
+
+    # only the area around the bull'seye point can contain the ring
+    if type(center) != type(None):
+        img_h, img_w = img.shape[:2]
+        x0, y0 = max(0, int(center[0] - max_radius) - 1), max(0, int(center[1] - max_radius) - 1)
+        x1, y1 = min(img_w, int(center[0] + max_radius) + 2), min(img_h, int(center[1] + max_radius) + 2)
+
+        if x1 - x0 < 1 or y1 - y0 < 1:
+            return estimatedRadius
+
+        img = img[y0:y1, x0:x1]
+        factor = config.circle_downsample
+
+        if factor > 1:
+            img = cv2.resize(img, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA)
+
+    circles = cv2.HoughCircles(img, cv2.HOUGH_GRADIENT, 1, config.circle_min_dist / factor,
+                               param1=config.circle_param1, param2=config.circle_param2,
+                               minRadius=int(min_radius / factor), maxRadius=int(np.ceil(max_radius / factor)))
+    
+    # use largest detected circle
+    if type(circles) != type(None):
+        return float(circles[0][:,2].max()) * factor
+        
+    # use a rough estimation of the target's radius as a fallback
+    else:
+        return estimatedRadius
+
+def emphasize_lines(img, distances, estimatedRadius, buffers=None, config=DEFAULT_CONFIG, radius=None):
     '''
     Emphasize all of the straight lines in the image and get rid of unnecessary noise.
 
@@ -47,45 +150,43 @@ def emphasize_lines(img, distances, estimatedRadius):
                            ]
         {Number} estimatedRadius - A rough estimation of the target's radius,
                                    that will be used if for some reason it cannot be calculated on the fly.
+        {FramePool} buffers - A pool of buffers to reuse instead of allocating new images
+        {AnalysisConfig} config - The thresholds of the analysis
+        {Number} radius - The target's radius, if it's already found by find_outer_ring
 
     Returns:
         {Number} The target's current radius [px].
         {Numpy.array} An image with the lines emphasized.
     '''
 
+    if buffers == None:
+        buffers = FramePool()
+
     # find the target's outer ring
-    circles = cv2.HoughCircles(img, cv2.HOUGH_GRADIENT, 1, 20,
-                               param1=50, param2=30, minRadius=0,
-                               maxRadius=int(estimatedRadius * 1.05))
-    
-    # use largest detected circle
-    if type(circles) != type(None):
-        outerCircle = sorted(circles[0], key=lambda x: x[2])[::-1][0]
-        radius = outerCircle[2]
-        
-    # use a rough estimation of the target's radius as a fallback
-    else:
-        radius = estimatedRadius
+    if radius == None:
+        radius = find_outer_ring(img, estimatedRadius, config)
 
     # zero out all pixels outside of the outer ring
-    img[distances[1] > radius] = 0
+    clear_outside(img, distances, radius, buffers)
     
     # apply thresh and morphology
-    _, img = cv2.threshold(img, 20, 0xff, cv2.THRESH_BINARY)
-    img = cv2.morphologyEx(img, cv2.MORPH_OPEN, np.ones((3,3), np.uint8))
+    _, img = cv2.threshold(img, config.diff_threshold, 0xff, cv2.THRESH_BINARY, dst=buffers.get('thresh', img.shape))
+    kernel = morph_kernel(config.morph_kernel, buffers)
+    img = cv2.morphologyEx(img, cv2.MORPH_OPEN, kernel, dst=buffers.get('opened', img.shape))
 
     # find the straight segments in the image
-    lines = cv2.HoughLinesP(img, 2, np.pi / 180, 120, minLineLength=20, maxLineGap=0)
-    img_copy = np.zeros(img.shape, dtype=img.dtype)
+    lines = cv2.HoughLinesP(img, 2, np.pi / 180, config.lines_threshold,
+                            minLineLength=config.lines_min_length, maxLineGap=config.lines_max_gap)
+    img_copy = buffers.zeros('lines', img.shape, img.dtype)
 
     if type(lines) != type(None):
         for line in lines:
             for x1, y1, x2, y2 in line:
-                cv2.line(img_copy, (x1, y1), (x2, y2), (0xff,0xff,0xff), 5)
+                cv2.line(img_copy, (x1, y1), (x2, y2), (0xff,0xff,0xff), config.line_thickness)
                 
     return radius, img_copy
 
-def reproduce_proj_contours(img, distances, bullseye, radius):
+def reproduce_proj_contours(img, distances, bullseye, radius, buffers=None, config=DEFAULT_CONFIG):
     '''
     Extend the emphasized lines outwards the target circle in order to restore
     the shape of the projectiles that might has been broken during the process.
@@ -105,22 +206,28 @@ def reproduce_proj_contours(img, distances, bullseye, radius):
                               {Number} y coordinate of the bull'seye point
                            )
         {Number} radius - The radius of the target
+        {FramePool} buffers - A pool of buffers to reuse instead of allocating new images
+        {AnalysisConfig} config - The thresholds of the analysis
 
     Returns:
         {List} A list of the projectiles' contours.
     '''
 
+    if buffers == None:
+        buffers = FramePool()
+
     # detect the unconvex contours (true projectile contours)
     contours = cv2.findContours(img, cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)[-2:]
-    rect_contours = cntr.filter_convex_contours(contours[0])
-    blank_img = np.zeros(img.shape, dtype=img.dtype)
+    rect_contours = cntr.filter_convex_contours(contours[0], config.contour_samples, config.contour_min_length,
+                                                config.contour_min_elongation)
+    blank_img = buffers.zeros('extensions', img.shape, img.dtype)
     
-    for cont in rect_contours:
-        cntr.extend_contour_line(blank_img, cont, bullseye, length=radius)
+    cntr.extend_contour_lines(blank_img, rect_contours, bullseye, length=radius)
     
     # clear unnecessary noise
-    blank_img[distances[1] > radius] = 0
-    blank_img = cv2.morphologyEx(blank_img, cv2.MORPH_CLOSE, np.ones((3,3), np.uint8))
+    clear_outside(blank_img, distances, radius, buffers)
+    kernel = morph_kernel(config.morph_kernel, buffers)
+    blank_img = cv2.morphologyEx(blank_img, cv2.MORPH_CLOSE, kernel, dst=buffers.get('closed', img.shape))
     
     # detect contours again, after the extension
     return cv2.findContours(blank_img, cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)[-2:][0]
@@ -156,6 +263,18 @@ def find_suspect_hits(contours, vertices, scale):
                                      divided by the estimated size of the target model
                                      (transformed size / actual size ratio)
                         )
+
+    Returns:
+        {List} [
+                  {Tuple} (
+                             {Number} x coordinate of the hit, corrected for the target's oval,
+                             {Number} y coordinate of the hit, corrected for the target's oval,
+                             {Number} The distance of the hit from the bull'seye point,
+                             {Tuple} The bull'seye point,
+                             {Tuple} The hit's point in the frame
+                          )
+                  ...
+               ]
     '''
 
     bullseye = vertices[5]
@@ -178,7 +297,7 @@ def find_suspect_hits(contours, vertices, scale):
         res_x = (hit[0] - vertices[0][0]) * scale[0] + vertices[0][0]
         res_y = (hit[1] - vertices[0][1]) * scale[1] + vertices[0][1]
         res_dist = geo2D.euclidean_dist(hit, bullseye)
-        res_hit = (res_x,res_y,res_dist, bullseye)
+        res_hit = (res_x,res_y,res_dist, bullseye, (hit[0],hit[1]))
         res.append(res_hit)
 
     return res
\ No newline at end of file